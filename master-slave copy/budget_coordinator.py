@@ -0,0 +1,30 @@
+import argparse
+import logging
+import os
+import sys
+
+# The shared slave pipeline lives at the repository root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from pipeline.coordinator import BudgetCoordinator
+
+# Shares one detector FPS budget between the slaves running on this host.
+# Started by launch_slaves.py when slave_config.yaml has a budget section.
+
+def main(args):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    coordinator = BudgetCoordinator(args.total_fps, port=args.port, min_fps=args.min_fps, interval=args.interval)
+    try:
+        coordinator.serve()
+    except KeyboardInterrupt:
+        print("Budget coordinator stopped")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Host-wide inference budget coordinator for co-located slaves")
+    parser.add_argument("--total-fps", type=float, default=40, help="Detector frames per second the whole host can afford")
+    parser.add_argument("--port", type=int, default=5100, help="Port the slaves report their load to")
+    parser.add_argument("--min-fps", type=float, default=2, help="Share every slave gets however quiet it is")
+    parser.add_argument("--interval", type=float, default=5, help="Seconds between reallocations")
+
+    args = parser.parse_args()
+
+    main(args)
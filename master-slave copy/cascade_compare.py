@@ -0,0 +1,63 @@
+import cv2
+from ultralytics import YOLO
+from tracker import EuclideanDistTracker
+import argparse
+import os
+import sys
+import time
+
+# The shared slave pipeline lives at the repository root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from pipeline.cascade import CascadeDetector
+from pipeline.counting import LaneCounter, load_line
+from pipeline.detection import detect_vehicles
+
+# FPS and count of the nano -> large cascade against always running the large model.
+
+def main(args):
+    large = YOLO(args.model)
+    cascade = CascadeDetector(YOLO(args.small), large, accept=args.accept)
+    line_start, line_end = load_line(args.line_file)
+    cap = cv2.VideoCapture(args.video_path)
+
+    runs = {
+        'large only': (large, LaneCounter(EuclideanDistTracker(), line_start, line_end)),
+        'cascade': (cascade, LaneCounter(EuclideanDistTracker(), line_start, line_end)),
+    }
+    seconds = {name: 0.0 for name in runs}
+
+    frames = 0
+    while True:
+        ret, frame = cap.read()
+        if not ret or (args.max_frames and frames >= args.max_frames):
+            break
+        for name, (model, counter) in runs.items():
+            started = time.perf_counter()
+            counter.update(detect_vehicles(model, frame))
+            seconds[name] += time.perf_counter() - started
+        if args.verbose:
+            print(f"Frame {frames}: {cascade.large_area[-1]:.1%} of the area went to the large model")
+        frames += 1
+
+    cap.release()
+    print(f"Frames: {frames}")
+    for name, (model, counter) in runs.items():
+        fps = frames / seconds[name] if seconds[name] else 0.0
+        print(f"{name}: count {counter.vehicle_count}, {fps:.2f} FPS")
+    areas = list(cascade.large_area)
+    if areas:
+        print(f"Large model area per frame: mean {sum(areas) / len(areas):.1%}, max {max(areas):.1%}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the two-tier cascade with the large model alone")
+    parser.add_argument("video_path", help="Path to the video file")
+    parser.add_argument("line_file", help="Counting line file from calibrate.py")
+    parser.add_argument("--model", default="yolov8x.pt", help="Large model")
+    parser.add_argument("--small", default="yolov8n.pt", help="Small model run on every full frame")
+    parser.add_argument("--accept", type=float, default=0.5, help="Small-model confidence accepted without a second look")
+    parser.add_argument("--max-frames", type=int, default=0, help="Stop after this many frames (0 = whole video)")
+    parser.add_argument("--verbose", action="store_true", help="Print the large-model area fraction for every frame")
+
+    args = parser.parse_args()
+
+    main(args)
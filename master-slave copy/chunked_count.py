@@ -0,0 +1,76 @@
+import cv2
+from tracker import EuclideanDistTracker
+import argparse
+import logging
+import multiprocessing as mp
+import os
+import sys
+import time
+
+# The shared slave pipeline lives at the repository root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from pipeline.chunked import chunk_ranges, count_chunk, stitch
+from pipeline.counting import load_line
+from pipeline.parallel import load_detector
+
+# Re-count long recordings by splitting every lane's video into time chunks,
+# counting each chunk in its own process with its own tracker, and stitching
+# the chunks using the frames they overlap.
+
+model = None  # Loaded once per worker process
+
+def init_worker(weights, backend, threads, imgsz):
+    global model
+    model = load_detector(weights, backend, threads, imgsz)
+
+def run_chunk(task):
+    lane, video_path, line, chunk, imgsz = task
+    return lane, chunk, count_chunk(model, video_path, line, *chunk, EuclideanDistTracker(), imgsz=imgsz)
+
+def main(args):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    weights = args.model
+    if args.backend == "onnx":
+        from pipeline.onnx_backend import export_onnx
+        weights = export_onnx(args.model, args.imgsz or 640)  # Once here, not in every worker
+
+    tasks = []
+    for lane, video_path, line_file in args.stream:
+        cap = cv2.VideoCapture(video_path)
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+        if args.frames:
+            frame_count = min(frame_count, args.frames)
+        line = load_line(line_file)
+        # With --chunks 1 every lane is one sequential pass, the reference to compare against
+        for chunk in chunk_ranges(frame_count, args.chunks, args.overlap_frames):
+            tasks.append((lane, video_path, line, chunk, args.imgsz))
+    logging.info(f"{len(tasks)} chunks over {len(args.stream)} lanes, {args.processes} processes")
+
+    started = time.perf_counter()
+    threads = max(1, (os.cpu_count() or 1) // args.processes)
+    with mp.Pool(args.processes, initializer=init_worker, initargs=(weights, args.backend, threads, args.imgsz)) as pool:
+        results = pool.map(run_chunk, tasks, chunksize=1)
+    elapsed = time.perf_counter() - started
+
+    for lane, _, _ in args.stream:
+        chunks = sorted((chunk, events) for name, chunk, events in results if name == lane)
+        frames = chunks[-1][0][2] if chunks else 0
+        print(f"Vehicle Count ({lane}): {stitch(chunks, lane)} over {frames} frames")
+    print(f"Finished in {elapsed:.1f}s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Count long recordings in parallel time chunks with tracker stitching")
+    parser.add_argument("--stream", nargs=3, action="append", required=True, metavar=("DIRECTION", "VIDEO", "LINE_FILE"),
+                        help="One lane: direction, video file and counting line file (repeat per lane)")
+    parser.add_argument("--model", default="yolov8x.pt", help="YOLOv8 weights")
+    parser.add_argument("--backend", choices=["torch", "onnx"], default="torch", help="Run the detector with ultralytics/PyTorch or ONNX Runtime")
+    parser.add_argument("--imgsz", type=int, default=None, help="Inference size")
+    parser.add_argument("--chunks", type=int, default=8, help="Time chunks per lane (1 = sequential reference run)")
+    parser.add_argument("--overlap-frames", type=int, default=150, help="Frames each chunk replays before its start to warm up its tracker")
+    parser.add_argument("--processes", type=int, default=4, help="Worker processes, each with its own model")
+    parser.add_argument("--frames", type=int, default=None, help="Only count the first n frames of each video")
+
+    args = parser.parse_args()
+
+    main(args)
@@ -0,0 +1,110 @@
+import cv2
+import numpy as np
+from tracker import EuclideanDistTracker
+import argparse
+import itertools
+import os
+import sys
+import time
+
+# The shared slave pipeline lives at the repository root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from pipeline.counting import LaneCounter, load_line
+from pipeline.detcache import DetectionCache, DetectionCacheWriter, replay
+from pipeline.detection import predict_arrays, vehicle_class_ids
+
+# Detect once, sweep many times: "build" runs the detector over a video and
+# stores every raw detection; "replay" re-runs filtering, tracking and line
+# counting from that cache for each combination of the given parameters.
+
+class SortTracker:
+    """SORT behind the EuclideanDistTracker interface: [x, y, w, h] in, [x, y, w, h, id] out."""
+
+    def __init__(self, max_age=1, min_hits=3, iou_threshold=0.3):
+        sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'yt2(experimental)')))
+        from sort import Sort
+        self.sort = Sort(max_age=max_age, min_hits=min_hits, iou_threshold=iou_threshold)
+
+    def update(self, objects_rect):
+        dets = np.array([[x, y, x + w, y + h, 1.0] for x, y, w, h in objects_rect]).reshape(-1, 5)
+        return [[int(x1), int(y1), int(x2 - x1), int(y2 - y1), int(id)] for x1, y1, x2, y2, id in self.sort.update(dets)]
+
+def build(args):
+    if args.backend == "onnx":
+        from pipeline.onnx_backend import load_onnx_model
+        model = load_onnx_model(args.model, args.imgsz or 640)
+    else:
+        from ultralytics import YOLO
+        model = YOLO(args.model)
+
+    cap = cv2.VideoCapture(args.video_path)
+    writer = DetectionCacheWriter(args.cache, video=os.path.abspath(args.video_path), model=args.model,
+                                  imgsz=args.imgsz, conf=args.conf, names=model.names,
+                                  width=int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                                  height=int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+    started = time.perf_counter()
+    frames = []
+    while True:
+        ret, frame = cap.read()
+        if ret:
+            frames.append(frame)
+        if frames and (len(frames) == args.batch_size or not ret):
+            for xyxy, conf, cls in predict_arrays(model, frames, args.imgsz, conf=args.conf):
+                writer.add(xyxy, conf, cls)
+            frames = []
+            done = len(writer.offsets) - 1
+            if done % 500 < args.batch_size:
+                print(f"{done} frames, {done / (time.perf_counter() - started):.1f} FPS")
+        if not ret:
+            break
+    cap.release()
+    writer.close()
+    print(f"Cached {writer.meta['detections']} detections from {writer.meta['frames']} frames in {args.cache}")
+
+def replay_sweep(args):
+    cache = DetectionCache(args.cache)
+    line_start, line_end = load_line(args.line_file)
+    classes = vehicle_class_ids(cache.names)
+    print(f"{len(cache)} frames, {cache.meta['detections']} cached detections (conf > {cache.meta['conf']})")
+
+    distances = args.max_distance if args.tracker == "euclid" else [None]  # SORT matches by IoU instead
+    for max_distance, min_area, min_conf, tolerance in itertools.product(distances, args.min_area,
+                                                                         args.min_conf, args.tolerance):
+        tracker = SortTracker() if args.tracker == "sort" else EuclideanDistTracker(max_distance)
+        counter = LaneCounter(tracker, line_start, line_end, tolerance)
+        started = time.perf_counter()
+        count = replay(cache, counter, classes, min_conf, min_area, args.frames)
+        elapsed = time.perf_counter() - started
+        setting = f"min_area {min_area}, min_conf {min_conf}, tolerance {tolerance}"
+        if args.tracker != "sort":
+            setting = f"max_distance {max_distance}, " + setting
+        print(f"{setting}: count {count} ({counter.frames / elapsed if elapsed else 0:.0f} FPS)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cache detections once and replay tracking and counting from the cache")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = commands.add_parser("build", help="Run the detector over a video and write the cache")
+    build_parser.add_argument("video_path", help="Path to the video file")
+    build_parser.add_argument("cache", help="Cache directory to write")
+    build_parser.add_argument("--model", default="yolov8x.pt", help="YOLOv8 weights")
+    build_parser.add_argument("--backend", choices=["torch", "onnx"], default="torch", help="Run the detector with ultralytics/PyTorch or ONNX Runtime")
+    build_parser.add_argument("--imgsz", type=int, default=None, help="Inference size")
+    build_parser.add_argument("--conf", type=float, default=0.1, help="Lowest confidence kept, so replays can sweep above it")
+    build_parser.add_argument("--batch-size", type=int, default=8, help="Frames per inference call")
+    build_parser.set_defaults(run=build)
+
+    replay_parser = commands.add_parser("replay", help="Count from a cache for every combination of the given parameters")
+    replay_parser.add_argument("cache", help="Cache directory written by build")
+    replay_parser.add_argument("line_file", help="Counting line file")
+    replay_parser.add_argument("--tracker", choices=["euclid", "sort"], default="euclid", help="EuclideanDistTracker or SORT")
+    replay_parser.add_argument("--max-distance", type=float, nargs="+", default=[30], help="Tracker distance thresholds (euclid)")
+    replay_parser.add_argument("--min-area", type=int, nargs="+", default=[500], help="Box area filters, in pixels")
+    replay_parser.add_argument("--min-conf", type=float, nargs="+", default=[0.5], help="Confidence thresholds")
+    replay_parser.add_argument("--tolerance", type=float, nargs="+", default=[10], help="Line crossing tolerances, in pixels")
+    replay_parser.add_argument("--frames", type=int, default=None, help="Only replay the first n frames")
+    replay_parser.set_defaults(run=replay_sweep)
+
+    args = parser.parse_args()
+
+    args.run(args)
@@ -0,0 +1,59 @@
+import cv2
+from ultralytics import YOLO
+from tracker import EuclideanDistTracker
+import argparse
+import os
+import sys
+
+# The shared slave pipeline lives at the repository root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from pipeline.counting import LaneCounter, load_line
+from pipeline.detection import detect_vehicles
+from pipeline.keyframe import KeyframeDetector
+
+# Count error of keyframe detection + optical flow against full-rate detection.
+# The detector runs once per frame; every keyframe interval reuses those results
+# on its keyframes, so all intervals are measured in a single pass.
+
+def main(args):
+    model = YOLO(args.model)
+    line_start, line_end = load_line(args.line_file)
+    cap = cv2.VideoCapture(args.video_path)
+
+    reference = LaneCounter(EuclideanDistTracker(), line_start, line_end)
+    current = {'detections': []}
+    keyframed = {}
+    for interval in args.intervals:
+        detector = KeyframeDetector(lambda frame: current['detections'], interval)
+        keyframed[interval] = (detector, LaneCounter(EuclideanDistTracker(), line_start, line_end))
+
+    frames = 0
+    while True:
+        ret, frame = cap.read()
+        if not ret or (args.max_frames and frames >= args.max_frames):
+            break
+        current['detections'] = detect_vehicles(model, frame)
+        reference.update(current['detections'])
+        for detector, counter in keyframed.values():
+            counter.update(detector(frame))
+        frames += 1
+
+    cap.release()
+    print(f"Frames: {frames}, full-rate count: {reference.vehicle_count}")
+    for interval, (detector, counter) in keyframed.items():
+        error = counter.vehicle_count - reference.vehicle_count
+        relative = abs(error) / reference.vehicle_count if reference.vehicle_count else 0.0
+        print(f"k={interval}: count {counter.vehicle_count}, error {error:+d} ({relative:.1%}), "
+              f"detector runs {detector.keyframes}/{frames}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure keyframe/optical-flow count error against full-rate detection")
+    parser.add_argument("video_path", help="Path to the video file")
+    parser.add_argument("line_file", help="Counting line file from calibrate.py")
+    parser.add_argument("--intervals", type=int, nargs="+", default=[2, 3, 5, 10], help="Keyframe intervals to compare")
+    parser.add_argument("--model", default="yolov8x.pt", help="YOLOv8 weights")
+    parser.add_argument("--max-frames", type=int, default=0, help="Stop after this many frames (0 = whole video)")
+
+    args = parser.parse_args()
+
+    main(args)
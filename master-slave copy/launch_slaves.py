@@ -8,7 +8,22 @@ def load_config(config_path):
     with open(config_path, 'r') as file:
         return yaml.safe_load(file)
 
-def run_slave(slave_config):
+def run_coordinator(budget_config):
+    # Host-wide detector budget shared by every slave this launcher starts
+    script_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'budget_coordinator.py')
+    cmd = [sys.executable, script_path]
+    for key in ('total_fps', 'port', 'min_fps', 'interval'):
+        if key in budget_config:
+            cmd += ['--' + key.replace('_', '-'), str(budget_config[key])]
+    try:
+        process = subprocess.Popen(cmd, universal_newlines=True)
+        print(f"Started budget coordinator with PID: {process.pid}")
+        return process
+    except Exception as e:
+        print(f"Error starting budget coordinator: {e}")
+        return None
+
+def run_slave(slave_config, coordinator_port=None):
     try:
         cmd = [
             sys.executable,
@@ -18,9 +33,40 @@ def run_slave(slave_config):
             '--host', slave_config['host'],
             '--port', str(slave_config['port'])
         ]
+        # Optional per-slave settings become command line flags
+        if slave_config.get('line_file'):
+            cmd += ['--line-file', slave_config['line_file']]
+        if slave_config.get('headless'):
+            cmd.append('--headless')
+        if slave_config.get('pipelined'):
+            cmd.append('--pipelined')
+        if slave_config.get('roi'):
+            cmd.append('--roi')
+        if slave_config.get('threaded_decode'):
+            cmd.append('--threaded-decode')
+        if slave_config.get('live'):
+            cmd.append('--live')
+        if slave_config.get('shm_decode'):
+            cmd.append('--shm-decode')
+        if slave_config.get('render_on_demand'):
+            cmd.append('--render-on-demand')
+        if slave_config.get('budget_models'):
+            cmd += ['--budget-models', *slave_config['budget_models']]
+        if coordinator_port:
+            cmd += ['--coordinator-port', str(coordinator_port)]
+        for key in ('batch_size', 'batch_timeout_ms', 'roi_pad', 'motion_gate', 'motion_min_changed',
+                    'keyframe_interval', 'latency_budget_ms', 'model', 'backend', 'cascade_small',
+                    'tile_size', 'tile_overlap', 'decode_skip', 'decode_width',
+                    'live_buffer', 'record_dir', 'record_segment_s', 'record_max_segments', 'record_policy',
+                    'render_every', 'render_scale', 'timing_trace'):
+            if key in slave_config:
+                cmd += ['--' + key.replace('_', '-'), str(slave_config[key])]
+        # Slave output goes to its own log file (or the console); an unread
+        # PIPE fills up and blocks a slave that logs counts and FPS
+        log_file = open(slave_config['log_file'], 'a') if slave_config.get('log_file') else None
         process = subprocess.Popen(cmd, 
-                                   stdout=subprocess.PIPE,
-                                   stderr=subprocess.PIPE,
+                                   stdout=log_file,
+                                   stderr=subprocess.STDOUT if log_file else None,
                                    universal_newlines=True)
         print(f"Started {slave_config['direction']} slave process with PID: {process.pid}")
         return process
@@ -28,18 +74,48 @@ def run_slave(slave_config):
         print(f"Error starting {slave_config['direction']} slave: {e}")
         return None
 
-def main(config_path):
+def run_multi_slave(config):
+    # All directions in one process sharing a single detector
+    slaves = config['slaves']
+    script_path = config.get('multi_script_path', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'multi_slave.py'))
+    try:
+        cmd = [sys.executable, script_path,
+               '--host', slaves[0]['host'],
+               '--port', str(slaves[0]['port'])]
+        for slave_config in slaves:
+            line_file = slave_config.get('line_file', f"line_start_end_{slave_config['direction'].lower()}.txt")
+            cmd += ['--stream', slave_config['direction'], slave_config['video_path'], line_file]
+        for key in ('schedule', 'backend', 'model', 'timing_trace'):
+            if config.get(key):
+                cmd += ['--' + key.replace('_', '-'), str(config[key])]
+        if all(slave_config.get('headless') for slave_config in slaves):
+            cmd.append('--headless')
+        process = subprocess.Popen(cmd, universal_newlines=True)
+        print(f"Started multi-stream slave process with PID: {process.pid}")
+        return process
+    except Exception as e:
+        print(f"Error starting multi-stream slave: {e}")
+        return None
+
+def main(config_path, multi_stream=False):
     config = load_config(config_path)
     processes = {}
     try:
-        for slave_config in config['slaves']:
-            processes[slave_config['direction']] = run_slave(slave_config)
+        if multi_stream:
+            processes['multi-stream'] = run_multi_slave(config)
+        else:
+            coordinator_port = None
+            if config.get('budget'):
+                processes['coordinator'] = run_coordinator(config['budget'])
+                coordinator_port = config['budget'].get('port', 5100)
+            for slave_config in config['slaves']:
+                processes[slave_config['direction']] = run_slave(slave_config, coordinator_port)
         
         print("All slave processes started. Press Ctrl+C to stop all processes.")
         
         # Wait for processes to complete (or KeyboardInterrupt)
-        for process in processes.values():
-            if process:
+        for name, process in processes.items():
+            if process and name != 'coordinator':  # The coordinator runs until we stop it
                 process.wait()
     
     except KeyboardInterrupt:
@@ -53,6 +129,7 @@ def main(config_path):
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Launch multiple slave programs for traffic monitoring")
     parser.add_argument("config", help="/home/adityaa/Desktop/Smart India Hackathon/master-slave copy/slaves.yaml")
+    parser.add_argument("--multi-stream", action="store_true", help="Run all directions in one process sharing one detector")
     args = parser.parse_args()
     
-    main(args.config)
\ No newline at end of file
+    main(args.config, args.multi_stream)
\ No newline at end of file
@@ -0,0 +1,171 @@
+import cv2
+from ultralytics import YOLO
+from tracker import EuclideanDistTracker
+import threading
+import argparse
+import logging
+import os
+import sys
+
+# The shared slave pipeline lives at the repository root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from pipeline.client import SlaveClient, send_vehicle_count
+from pipeline.counting import LaneCounter, load_line
+from pipeline.detection import detect_vehicles, detect_vehicles_batch
+from pipeline.motion import MotionGate
+from pipeline.render import draw_overlay
+from pipeline.roi import line_roi, roi_fraction
+from pipeline.throttle import ThrottledDetector
+from pipeline.timing import StageTimer, timed
+
+class Stream:
+    """One approach: its video, tracker, crossed vehicles and master lane."""
+
+    def __init__(self, direction, video_path, line_file, host, port, roi_pad=None, motion_gate=None, timer=None):
+        self.direction = direction
+        self.cap = cv2.VideoCapture(video_path)
+        line_start, line_end = load_line(line_file)
+        self.timer = timer  # StageTimer shared by all streams of this process
+        self.counter = LaneCounter(EuclideanDistTracker(), line_start, line_end, timer=timer)
+
+        # Padded crop around this stream's counting line, if enabled
+        self.roi = None
+        if roi_pad is not None:
+            frame_shape = (int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)), int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)))
+            self.roi = line_roi(line_start, line_end, frame_shape, pad=roi_pad)
+            logging.info(f"ROI ({direction}): {self.roi}, {roi_fraction(self.roi, frame_shape):.0%} of the frame pixels")
+
+        # Static frames skip the detector
+        self.gate = MotionGate(self.roi, method=motion_gate) if motion_gate else None
+        self.last_detections = None
+
+        # Sampling rate the master asks for; the shared detector is called by
+        # main(), so this only picks the frames and moves boxes in between
+        self.throttle = ThrottledDetector(None, name=direction)
+
+        # Each lane keeps its own connection to the master
+        self.client = SlaveClient(host=host, port=port, on_control=self.on_control)
+        self.client.connect()
+        stats = [self.throttle.stats] + ([self.gate.stats] if self.gate else [])
+        if timer:
+            stats.append(timer.stats)
+        send_thread = threading.Thread(target=send_vehicle_count, args=(self.client, direction, self.counter, stats))
+        send_thread.daemon = True
+        send_thread.start()
+
+    def on_control(self, message):
+        if 'sample_fps' in message:
+            self.throttle.set_rate(message['sample_fps'])
+
+    def needs_detection(self, frame):
+        due, = self.throttle.due(1)
+        if not due:
+            return False
+        if self.gate is None or self.last_detections is None:
+            return True
+        return self.gate.moved(frame)
+
+    def process(self, frame, detections, headless):
+        if detections is not None:
+            self.last_detections = detections
+        # Frames without detections get the last boxes moved along (or repeated at full rate)
+        boxes_ids = self.counter.update(self.throttle.step(frame, detections))
+        if not headless:
+            with timed(self.timer, 'render'):
+                draw_overlay(frame, boxes_ids, self.counter.line_start, self.counter.line_end, self.roi)
+            with timed(self.timer, 'display'):
+                cv2.imshow(f"Frame - {self.direction}", frame)
+
+    def close(self):
+        self.cap.release()
+        self.client.close()
+
+def main(args):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    # One detector shared by every stream
+    if args.backend == "onnx":
+        from pipeline.onnx_backend import load_onnx_model
+        model = load_onnx_model(args.model)
+    else:
+        model = YOLO(args.model)
+
+    # Per-stage timings for all streams, reported with each lane's counts
+    timer = StageTimer(trace_path=args.timing_trace)
+
+    streams = []
+    for direction, video_path, line_file in args.stream:
+        try:
+            streams.append(Stream(direction, video_path, line_file, args.host, args.port,
+                                  args.roi_pad if args.roi else None, args.motion_gate, timer))
+        except FileNotFoundError:
+            print(f"Line position file for {direction} not found. Run the calibration script first.")
+            exit()
+
+    active = list(streams)
+    round_index = 0
+    try:
+        while active:
+            # Take the next frame from every stream that still has one
+            timer.begin(round_index)
+            round_index += 1
+            frames = []
+            for stream in list(active):
+                with timer.stage('read'):
+                    ret, frame = stream.cap.read()
+                if not ret:
+                    logging.info(f"Stream {stream.direction} finished with count {stream.counter.vehicle_count}")
+                    active.remove(stream)
+                    continue
+                frames.append((stream, frame))
+            if not frames:
+                break
+
+            # Streams whose motion gate saw nothing new skip the detector this round
+            todo = [(stream, frame) for stream, frame in frames if stream.needs_detection(frame)]
+            with timer.stage('detect'):
+                if args.schedule == "batched":
+                    results = detect_vehicles_batch(model, [frame for _, frame in todo],
+                                                    [stream.roi for stream, _ in todo], timer=timer) if todo else []
+                else:
+                    results = [detect_vehicles(model, frame, stream.roi, timer=timer) for stream, frame in todo]
+            detected = {id(stream): detections for (stream, _), detections in zip(todo, results)}
+
+            for stream, frame in frames:
+                stream.process(frame, detected.get(id(stream)), args.headless)
+
+            if not args.headless:
+                key = cv2.waitKey(1)
+                if key == 27:  # Press ESC to exit
+                    break
+
+    except KeyboardInterrupt:
+        print("Interrupted by user")
+    finally:
+        for stream in streams:
+            stream.close()
+        if not args.headless:
+            cv2.destroyAllWindows()
+        logging.info(f"Stage ms p50/p95/p99 (multi-stream): {timer.describe()}")
+        timer.close()
+        print("Cleaned up and exited (multi-stream)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Traffic monitoring slave for several directions sharing one detector")
+    parser.add_argument("--stream", nargs=3, action="append", required=True,
+                        metavar=("DIRECTION", "VIDEO_PATH", "LINE_FILE"), help="One approach to monitor (repeat per direction)")
+    parser.add_argument("--host", default="localhost", help="Host IP of the master server")
+    parser.add_argument("--port", type=int, default=5000, help="Port of the master server")
+    parser.add_argument("--model", default="yolov8x.pt", help="YOLOv8 weights shared by all streams")
+    parser.add_argument("--backend", choices=["torch", "onnx"], default="torch", help="Run the detector with ultralytics/PyTorch or ONNX Runtime")
+    parser.add_argument("--schedule", choices=["round-robin", "batched"], default="batched",
+                        help="One model call per frame in turn, or one batched call per round")
+    parser.add_argument("--roi", action="store_true", help="Run the detector only on a padded crop around each counting line")
+    parser.add_argument("--roi-pad", type=int, default=150, help="Padding around the counting line for --roi, in pixels")
+    parser.add_argument("--motion-gate", choices=["diff", "mog2"], default=None, help="Skip inference on frames with no motion inside the ROI")
+    parser.add_argument("--timing-trace", default=None, help="Write every stage timing of every round to this CSV file")
+    parser.add_argument("--headless", action="store_true", help="Skip drawing and windows; report counts and FPS only to the master and the log")
+
+    args = parser.parse_args()
+
+    main(args)
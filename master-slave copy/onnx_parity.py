@@ -0,0 +1,70 @@
+import numpy as np
+from ultralytics import YOLO
+import argparse
+import os
+import sys
+
+# The shared slave pipeline lives at the repository root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from pipeline.detection import box_iou, predict_arrays
+from pipeline.onnx_backend import load_onnx_model
+from pipeline.video import sample_frames
+
+# Compare the ONNX Runtime backend with the ultralytics/PyTorch path on sample frames.
+
+def match(reference, candidate, min_iou):
+    # Greedy same-class matching by IoU; returns matched IoUs and confidence differences
+    ref_xyxy, ref_conf, ref_cls = reference
+    xyxy, conf, cls = candidate
+    if not len(ref_xyxy) or not len(xyxy):
+        return [], []
+    iou = box_iou(ref_xyxy, xyxy)
+    iou[ref_cls[:, None] != cls[None, :]] = 0
+    ious, conf_diffs, used = [], [], set()
+    for i in np.argsort(-ref_conf):
+        for j in np.argsort(-iou[i]):
+            if iou[i, j] < min_iou:
+                break
+            if j not in used:
+                used.add(j)
+                ious.append(iou[i, j])
+                conf_diffs.append(abs(ref_conf[i] - conf[j]))
+                break
+    return ious, conf_diffs
+
+def main(args):
+    torch_model = YOLO(args.model)
+    onnx_model = load_onnx_model(args.model, args.imgsz)
+    frames = sample_frames(args.source, args.frames)
+
+    ref_total = onnx_total = 0
+    all_ious, all_diffs = [], []
+    for frame in frames:
+        reference = predict_arrays(torch_model, [frame], args.imgsz)[0]
+        candidate = predict_arrays(onnx_model, [frame], args.imgsz)[0]
+        ious, diffs = match(reference, candidate, args.min_iou)
+        ref_total += len(reference[0])
+        onnx_total += len(candidate[0])
+        all_ious += ious
+        all_diffs += diffs
+
+    recall = len(all_ious) / ref_total if ref_total else 1.0
+    print(f"Frames: {len(frames)}, boxes torch {ref_total} / onnx {onnx_total}")
+    print(f"Matched: {len(all_ious)} ({recall:.1%}), mean IoU {np.mean(all_ious) if all_ious else 0:.3f}, "
+          f"max conf diff {max(all_diffs) if all_diffs else 0:.3f}")
+    passed = recall >= args.min_match and abs(onnx_total - ref_total) <= (1 - args.min_match) * max(ref_total, 1)
+    print("Parity check passed" if passed else "Parity check FAILED")
+    sys.exit(0 if passed else 1)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check ONNX Runtime detections against the PyTorch path")
+    parser.add_argument("source", help="Video file or directory of images to sample")
+    parser.add_argument("--model", default="yolov8x.pt", help="YOLOv8 weights (exported to ONNX next to them)")
+    parser.add_argument("--frames", type=int, default=20, help="Number of sample frames")
+    parser.add_argument("--imgsz", type=int, default=640, help="Inference size for both backends")
+    parser.add_argument("--min-iou", type=float, default=0.9, help="IoU for two boxes to count as the same detection")
+    parser.add_argument("--min-match", type=float, default=0.95, help="Fraction of PyTorch boxes the ONNX path must reproduce")
+
+    args = parser.parse_args()
+
+    main(args)
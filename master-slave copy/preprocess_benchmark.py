@@ -0,0 +1,74 @@
+import cv2
+import numpy as np
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+# The shared slave pipeline lives at the repository root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from pipeline.onnx_backend import letterbox
+from pipeline.preprocess import BufferPool
+from pipeline.video import sample_frames
+
+# Compare per-frame allocations and time of the old allocating letterbox path
+# with the preallocated buffers the ONNX backend now uses.
+
+def allocating_preprocess(images, size):
+    # The previous OnnxDetector.preprocess: letterbox copy, stack, flip, transpose, cast, divide
+    blobs, transforms = [], []
+    for image in images:
+        padded, scale, pad = letterbox(image, size)
+        blobs.append(padded)
+        transforms.append((scale, pad, image.shape[:2]))
+    batch = np.stack(blobs)[..., ::-1].transpose(0, 3, 1, 2)
+    return np.ascontiguousarray(batch, dtype=np.float32) / 255.0, transforms
+
+def measure(preprocess, frames, size, batch):
+    batches = [frames[i:i + batch] for i in range(0, len(frames) - batch + 1, batch)]
+    preprocess(batches[0], size)  # Warm up, so buffers are created outside the measurement
+
+    started = time.perf_counter()
+    for images in batches:
+        preprocess(images, size)
+    ms = (time.perf_counter() - started) / (len(batches) * batch) * 1000
+
+    # Peak memory allocated inside each call, above what was live before it
+    tracemalloc.start()
+    allocated = []
+    for images in batches:
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        preprocess(images, size)
+        allocated.append(tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+    return ms, np.mean(allocated) / batch / 1024
+
+def main(args):
+    frames = sample_frames(args.source, args.frames)
+    if args.width:
+        frames = [cv2.resize(f, (args.width, int(f.shape[0] * args.width / f.shape[1]))) for f in frames]
+    print(f"Frames: {len(frames)} at {frames[0].shape[1]}x{frames[0].shape[0]}, batch {args.batch}")
+
+    pool = BufferPool()
+    for size in args.sizes:
+        results = {}
+        for label, preprocess in (("allocating", allocating_preprocess), ("preallocated", pool.fill)):
+            results[label] = measure(preprocess, frames, size, args.batch)
+            ms, kb = results[label]
+            print(f"imgsz {size:5d} {label:>12}: {ms:6.2f} ms/frame, {kb:9.1f} KB allocated/frame")
+        speedup = results["allocating"][0] / max(results["preallocated"][0], 1e-9)
+        print(f"imgsz {size:5d}      speedup: {speedup:.2f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark letterbox preprocessing with and without preallocated buffers")
+    parser.add_argument("source", help="Video file or directory of images to sample")
+    parser.add_argument("--frames", type=int, default=64, help="Number of sample frames")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[640, 960, 1280], help="Inference sizes to test")
+    parser.add_argument("--batch", type=int, default=1, help="Frames per preprocess call")
+    parser.add_argument("--width", type=int, help="Resize sample frames to this width first")
+
+    args = parser.parse_args()
+
+    main(args)
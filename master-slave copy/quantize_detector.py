@@ -0,0 +1,62 @@
+import argparse
+import logging
+import os
+import sys
+
+# The shared slave pipeline and the dataset evaluation live at the repository root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from pipeline.onnx_backend import OnnxDetector, export_onnx
+from pipeline.quantize import accuracy_regression, quantize_detector
+from pipeline.video import sample_frames
+from yt2OnIndianDATASETTail.evaluateModel import evaluate, ground_truth_path, test_images_path
+
+# Build an INT8 detector for the slaves and keep it only if it scores close
+# enough to FP32 on the test set (same scoring as evaluateModel.py).
+
+def main(args):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    fp32_path = export_onnx(args.model, args.imgsz)
+    int8_path = args.output or os.path.splitext(fp32_path)[0] + '.int8.onnx'
+    fp32 = OnnxDetector(fp32_path, args.imgsz)
+
+    # Calibration frames come from our own junction recordings
+    frames = []
+    if args.method == 'static':
+        per_source = max(1, args.calib_frames // len(args.calib))
+        for source in args.calib:
+            frames += sample_frames(source, per_source)
+    quantize_detector(fp32_path, int8_path, args.method, fp32, frames, args.imgsz)
+    int8 = OnnxDetector(int8_path, args.imgsz)
+
+    # Accuracy guardrail
+    scores = {}
+    for name, detector in (('FP32', fp32), ('INT8', int8)):
+        scores[name] = evaluate(lambda image: detector.predict_arrays([image])[0][0],
+                                args.test_images, args.test_labels)
+        print(f"{name}: precision {scores[name][0]:.3f}, recall {scores[name][1]:.3f}, F1 {scores[name][2]:.3f}")
+
+    reasons = accuracy_regression(scores['FP32'], scores['INT8'], args.max_drop)
+    if reasons:
+        os.replace(int8_path, int8_path + '.rejected')
+        print(f"INT8 model rejected: {'; '.join(reasons)}")
+        sys.exit(1)
+    print(f"INT8 model accepted: {int8_path} (run slaves with --backend onnx --model {int8_path})")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Quantize the slave detector to INT8 with an accuracy guardrail")
+    parser.add_argument("--model", default="yolov8x.pt", help="YOLOv8 weights (or an exported .onnx)")
+    parser.add_argument("--method", choices=["static", "dynamic"], default="static", help="Static INT8 needs calibration frames")
+    parser.add_argument("--calib", nargs="+", default=[], help="Recorded videos or image directories to calibrate on")
+    parser.add_argument("--calib-frames", type=int, default=200, help="Total calibration frames")
+    parser.add_argument("--test-images", default=test_images_path, help="Evaluation images")
+    parser.add_argument("--test-labels", default=ground_truth_path, help="Evaluation labels (YOLO format)")
+    parser.add_argument("--max-drop", type=float, default=0.02, help="Largest allowed precision or recall drop versus FP32")
+    parser.add_argument("--imgsz", type=int, default=640, help="Inference size")
+    parser.add_argument("--output", default=None, help="Where to write the INT8 model (default: <model>.int8.onnx)")
+
+    args = parser.parse_args()
+    if args.method == "static" and not args.calib:
+        parser.error("--calib is required for static quantization")
+
+    main(args)
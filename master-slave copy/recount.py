@@ -0,0 +1,75 @@
+import cv2
+from tracker import EuclideanDistTracker
+import argparse
+import logging
+import os
+import sys
+import time
+
+# The shared slave pipeline lives at the repository root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from pipeline.counting import LaneCounter, load_line
+from pipeline.detection import detect_vehicles
+from pipeline.parallel import ParallelCounter, load_detector
+from pipeline.roi import line_roi
+
+# Offline re-count of a recorded approach with detection spread over worker
+# processes. --verify repeats the count sequentially and compares.
+
+def count_sequential(args, line_start, line_end, roi):
+    weights = args.model
+    if args.backend == "onnx":
+        from pipeline.onnx_backend import export_onnx
+        weights = export_onnx(args.model, args.imgsz or 640)
+    model = load_detector(weights, args.backend, os.cpu_count() or 1, args.imgsz)
+    counter = LaneCounter(EuclideanDistTracker(), line_start, line_end)
+    cap = cv2.VideoCapture(args.video_path)
+    started = time.perf_counter()
+    while args.frames is None or counter.frames < args.frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        counter.update(detect_vehicles(model, frame, roi, args.imgsz))
+    cap.release()
+    elapsed = time.perf_counter() - started
+    logging.info(f"Sequential count: {counter.vehicle_count} vehicles, {counter.frames} frames in {elapsed:.1f}s "
+                 f"({counter.frames / elapsed if elapsed else 0:.1f} FPS)")
+    return counter.vehicle_count
+
+def main(args):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    line_start, line_end = load_line(args.line_file)
+
+    roi = None
+    if args.roi:
+        cap = cv2.VideoCapture(args.video_path)
+        frame_shape = (int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)), int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)))
+        cap.release()
+        roi = line_roi(line_start, line_end, frame_shape, pad=args.roi_pad)
+
+    counter = LaneCounter(EuclideanDistTracker(), line_start, line_end)
+    parallel = ParallelCounter(args.model, args.workers, args.backend, roi, args.imgsz)
+    count = parallel.run(args.video_path, counter, args.frames)
+    print(f"Vehicle Count: {count}")
+
+    if args.verify:
+        sequential = count_sequential(args, line_start, line_end, roi)
+        print("Counts match" if sequential == count else f"Counts DIFFER: sequential {sequential}, parallel {count}")
+        sys.exit(0 if sequential == count else 1)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-count a recording with frame-parallel detection workers")
+    parser.add_argument("video_path", help="Path to the video file")
+    parser.add_argument("line_file", help="Counting line file")
+    parser.add_argument("--model", default="yolov8x.pt", help="YOLOv8 weights")
+    parser.add_argument("--backend", choices=["torch", "onnx"], default="torch", help="Run the detector with ultralytics/PyTorch or ONNX Runtime")
+    parser.add_argument("--workers", type=int, default=4, help="Detection worker processes")
+    parser.add_argument("--imgsz", type=int, default=None, help="Inference size")
+    parser.add_argument("--frames", type=int, default=None, help="Only count the first n frames")
+    parser.add_argument("--roi", action="store_true", help="Run the detector only on a padded crop around the counting line")
+    parser.add_argument("--roi-pad", type=int, default=150, help="Padding around the counting line for --roi, in pixels")
+    parser.add_argument("--verify", action="store_true", help="Also count sequentially and check the counts are identical")
+
+    args = parser.parse_args()
+
+    main(args)
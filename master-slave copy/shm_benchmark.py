@@ -0,0 +1,60 @@
+import cv2
+from ultralytics import YOLO
+from tracker import EuclideanDistTracker
+import argparse
+import os
+import resource
+import sys
+import time
+
+# The shared slave pipeline lives at the repository root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from pipeline.counting import LaneCounter, load_line
+from pipeline.detection import detect_vehicles
+from pipeline.shm_ring import SharedMemorySource
+
+# Headless slave loop with decoding in-process versus in a decoder process
+# feeding a shared-memory ring. Reports FPS and CPU use of both processes.
+
+def cpu_seconds():
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)  # Decoder processes once joined
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+def run(mode, args, model, line):
+    cap = SharedMemorySource(args.video_path) if mode == "shm" else cv2.VideoCapture(args.video_path)
+    counter = LaneCounter(EuclideanDistTracker(), *line)
+    cpu_before = cpu_seconds()
+    started = time.perf_counter()
+    frames = 0
+    while frames < args.frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        counter.update(detect_vehicles(model, frame, imgsz=args.imgsz) if model else [])
+        frames += 1
+    elapsed = time.perf_counter() - started
+    cap.release()
+    cpu = cpu_seconds() - cpu_before
+    print(f"{mode:>6}: {frames} frames, {frames / elapsed:6.1f} FPS, CPU {100 * cpu / elapsed:5.0f}% "
+          f"({1000 * cpu / max(frames, 1):.1f} ms/frame), count {counter.vehicle_count}")
+
+def main(args):
+    # Without --model only decoding and tracking are timed
+    model = YOLO(args.model) if args.model else None
+    line = load_line(args.line_file) if args.line_file else ((0, 0), (1, 0))
+    for mode in args.modes:
+        run(mode, args, model, line)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the shared-memory decoder process against the single-process slave loop")
+    parser.add_argument("video_path", help="Path to the video file")
+    parser.add_argument("--model", default=None, help="YOLOv8 weights (omit to time decoding and tracking only)")
+    parser.add_argument("--imgsz", type=int, default=None, help="Inference size")
+    parser.add_argument("--line-file", default=None, help="Counting line file")
+    parser.add_argument("--frames", type=int, default=500, help="Frames to process per mode")
+    parser.add_argument("--modes", nargs="+", choices=["single", "shm"], default=["single", "shm"], help="Decoding modes to compare")
+
+    args = parser.parse_args()
+
+    main(args)
@@ -1,148 +1,352 @@
 import cv2
-import numpy as np
 from ultralytics import YOLO
 from tracker import EuclideanDistTracker
 import threading
 import time
-import socket
-import json
-
-# SlaveClient class (embedded connection logic)
-class SlaveClient:
-    def __init__(self, host='localhost', port=5000):
-        self.host = host
-        self.port = port
-        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.connected = False
-
-    def connect(self):
-        try:
-            self.sock.connect((self.host, self.port))
-            self.connected = True
-            print(f"Connected to master server at {self.host}:{self.port}")
-        except Exception as e:
-            print(f"Failed to connect to master server: {e}")
-
-    def send_vehicle_count(self, lane, count):
-        if not self.connected:
-            print("Not connected to master server")
-            return
-        message = json.dumps({'lane': lane, 'count': count})
-        try:
-            self.sock.sendall(message.encode('utf-8'))
-        except Exception as e:
-            print(f"Failed to send data to master server: {e}")
-            self.connected = False
-
-    def close(self):
-        self.sock.close()
-
-# Load the YOLOv8 model
-model = YOLO('yolov8x.pt')
-
-# Create tracker object
-tracker = EuclideanDistTracker()
-
-# Load the saved line positions
-try:
-    with open("line_start_end.txt", "r") as f:
-        line_start = tuple(map(int, f.readline().strip().split(',')))
-        line_end = tuple(map(int, f.readline().strip().split(',')))
-except FileNotFoundError:
-    print("Line position file not found. Run the calibration script first.")
-    exit()
-
-# Open video file
-cap = cv2.VideoCapture("/home/adityaa/Desktop/Smart India Hackathon/video samples/highway.mp4")
-
-# Initialize counters and tracking data
-vehicle_count = 0
-crossed_vehicles = set()  # To store IDs of vehicles that have crossed the line
-
-# Initialize SlaveClient
-client = SlaveClient(host='0.0.0.0', port=5000)  # Replace with your master server's IP and port
-client.connect()
-
-def send_vehicle_count():
-    global vehicle_count
-    while True:
-        if client.connected:
-            client.send_vehicle_count("North", vehicle_count)  # Replace "North" with the actual lane
+import argparse
+import logging
+import os
+import signal
+import sys
+
+# The shared slave pipeline lives at the repository root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from pipeline.budget import BudgetedDetector, LatencyBudget, build_ladder
+from pipeline.cascade import CascadeDetector
+from pipeline.coordinator import CoordinatorClient
+from pipeline.client import SlaveClient, send_vehicle_count
+from pipeline.counting import LaneCounter, load_line
+from pipeline.detection import detect_vehicles, detect_vehicles_batch
+from pipeline.keyframe import KeyframeDetector
+from pipeline.motion import GatedDetector, MotionGate
+from pipeline.recorder import AsyncRecorder
+from pipeline.render import RenderPolicy, RenderStage, draw_overlay
+from pipeline.roi import line_roi, roi_fraction
+from pipeline.shm_ring import SharedMemorySource
+from pipeline.stages import SlavePipeline
+from pipeline.throttle import ThrottledDetector
+from pipeline.tiling import TiledDetector
+from pipeline.timing import StageTimer
+from pipeline.video import LiveReplaySource, ThreadedVideoSource
+
+def main(args):
+    direction = args.direction
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    # Annotated evidence clips, encoded in a separate process. Created first,
+    # since its encoder is forked before any thread or model exists
+    recorder = None
+    if args.record_dir:
+        recorder = AsyncRecorder(args.record_dir, segment_seconds=args.record_segment_s,
+                                 max_segments=args.record_max_segments, policy=args.record_policy,
+                                 prefix=direction.lower())
+
+    # Load the YOLOv8 model, with ultralytics/PyTorch or exported to ONNX and run on onnxruntime
+    if args.backend == "onnx":
+        from pipeline.onnx_backend import load_onnx_model as load_model
+    else:
+        load_model = YOLO
+    stats = []
+    small = load_model(args.cascade_small) if args.cascade_small else None
+
+    def prepare(model):
+        # Overlapping native-resolution tiles for dense frames full of small vehicles
+        if args.tile_size:
+            model = TiledDetector(model, args.tile_size, args.tile_overlap)
+        # Nano model on every frame, the large model only on regions it is unsure about
+        if small is not None:
+            model = CascadeDetector(small, model)
+        return model
+
+    # The latency budget loads its other weights through prepare() as well
+    model = prepare(load_model(args.model))
+
+    # Load the saved line positions
+    try:
+        line_start, line_end = load_line(args.line_file or f"line_start_end_{direction.lower()}.txt")
+    except FileNotFoundError:
+        print(f"Line position file for {direction} not found. Run the calibration script first.")
+        exit()
+
+    # Open video file, optionally replayed like a live camera that drops stale
+    # frames, or decoded in a background thread that only retrieves every
+    # --decode-skip frame, shrunk to --decode-width
+    live = None
+    scale = 1.0  # Decoded size / source size; pixel thresholds below are scaled to match
+    if args.live:
+        cap = live = LiveReplaySource(args.video_path, buffer_size=args.live_buffer)
+        stats.append(live.stats)
+    elif args.shm_decode:
+        # Decoder in its own process writing into a shared-memory ring; every
+        # frame that can sit in the pipeline queues or a batch keeps its slot
+        # (rendering works on copies, since it drops frames instead of waiting)
+        hold = 2 * max(args.queue_size, args.batch_size) + args.batch_size + 5 if args.pipelined or args.batch_size > 1 else 4
+        cap = SharedMemorySource(args.video_path, hold=hold)
+        stats.append(cap.stats)
+    elif args.threaded_decode or args.decode_skip > 1 or args.decode_width:
+        cap = ThreadedVideoSource(args.video_path, skip=args.decode_skip, width=args.decode_width)
+        line_start, line_end = cap.scale_point(line_start), cap.scale_point(line_end)
+        scale = cap.scale
+        stats.append(cap.stats)
+    else:
+        cap = cv2.VideoCapture(args.video_path)
+
+    # Only run the detector on a padded band around the counting line
+    roi = None
+    if args.roi:
+        frame_shape = (int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)), int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)))
+        roi = line_roi(line_start, line_end, frame_shape, pad=int(args.roi_pad * scale))
+        logging.info(f"ROI ({direction}): {roi}, {roi_fraction(roi, frame_shape):.0%} of the frame pixels")
+
+    # Rolling per-stage timings, reported with the counts; --timing-trace also logs every frame
+    timer = StageTimer(trace_path=args.timing_trace)
+    stats.append(timer.stats)
+
+    # Tracker, counters and crossed vehicle IDs for this lane
+    min_area = 500 * scale ** 2
+    counter = LaneCounter(EuclideanDistTracker(max_distance=30 * scale), line_start, line_end,
+                          tolerance=10 * scale, timer=timer)
+
+    # Initialize SlaveClient; the master may tell this lane how often to run the detector
+    def on_control(message):
+        if 'sample_fps' in message:
+            throttle.set_rate(message['sample_fps'])
+
+    client = SlaveClient(host=args.host, port=args.port, on_control=on_control)
+    client.connect()
+
+    # Detector for single frames and for micro-batches
+    detect = lambda frame: detect_vehicles(model, frame, roi, timer=timer, min_area=min_area)
+    detect_batch = lambda frames: detect_vehicles_batch(model, frames, [roi] * len(frames), timer=timer,
+                                                        min_area=min_area)
+
+    # Step imgsz, frame skip and model size to stay within a per-frame latency budget
+    budget = None
+    if args.latency_budget_ms > 0:
+        # With a coordinator, its share sets the detection rate and the budget only picks the tier
+        ladder = build_ladder(args.model, args.budget_models, max_skip=1 if args.coordinator_port else 4)
+        budget = LatencyBudget(args.latency_budget_ms / 1000, ladder, start=ladder.index((args.model, 640, 1)),
+                               name=direction)
+        budgeted = BudgetedDetector(budget, lambda name: prepare(load_model(name)), roi,
+                                    models={args.model: model}, timer=timer, observe=bool(args.coordinator_port),
+                                    min_area=min_area)
+        detect, detect_batch = budgeted, budgeted.batch
+        stats.append(budget.stats)
+
+    # Cascade stats of whichever model the budget is running
+    if small is not None:
+        stats.append(lambda: (budgeted.models.get(budget.setting[0], model) if budget else model).stats())
+
+    # Skip inference on frames where nothing moved inside the ROI
+    if args.motion_gate:
+        gate = MotionGate(roi, method=args.motion_gate, min_changed=args.motion_min_changed)
+        gated = GatedDetector(detect, gate, detect_batch)
+        detect, detect_batch = gated, gated.batch
+        stats.append(gate.stats)
+
+    # Detect on keyframes only and follow the boxes with optical flow in between
+    if args.keyframe_interval > 1:
+        keyframer = KeyframeDetector(detect, args.keyframe_interval, detect_batch)
+        detect, detect_batch = keyframer, keyframer.batch
+        stats.append(keyframer.stats)
+
+    # Detect only as often as the master needs this lane's count to be fresh,
+    # following the boxes with optical flow in between
+    throttle = ThrottledDetector(detect, detect_batch, name=direction)
+    detect, detect_batch = throttle, throttle.batch
+    stats.append(throttle.stats)
+
+    # Only frames the render policy draws get recorded, so clips are encoded at
+    # the source's frame rate (known now that it is open) over --render-every
+    if recorder:
+        recorder.fps = (cap.get(cv2.CAP_PROP_FPS) or 25.0) / max(1, args.render_every)
+        stats.append(recorder.stats)
+
+    # Draw overlays only on some frames, on request, or on a shrunken copy
+    render_policy = None
+    if args.render_every > 1 or args.render_scale < 1 or args.render_on_demand:
+        render_policy = RenderPolicy(args.render_every, args.render_scale, args.render_on_demand)
+        if args.render_on_demand:
+            # kill -USR1 <pid> shows the overlay for the next few seconds
+            signal.signal(signal.SIGUSR1, lambda signum, frame: render_policy.request())
+
+    def annotate(index, frame, boxes_ids):
+        frame = draw_overlay(frame, boxes_ids, line_start, line_end, roi,
+                             render_policy.scale if render_policy else 1.0)
+        if recorder:
+            recorder.write(frame)
+        return frame
+
+    # Frame age at the counting stage feeds the latency budget and the live source stats
+    def on_frame(index, latency):
+        if budget and not budgeted.observe:
+            budget.observe(latency)
+        if live:
+            live.observe_age(latency)
+
+    # Share of the host-wide detector budget, handed out by the coordinator launch_slaves.py starts
+    pipeline = None
+    if args.coordinator_port:
+        def load():
+            summary = timer.summary()
+            if pipeline:
+                size, maxsize = pipeline.queue_fill()['capture']
+                backlog = size / maxsize
+            else:
+                backlog = live.drop_rate() if live else 0.0
+            latency = sum(summary.get(stage, (0, 0, 0))[1] for stage in ('model', 'postprocess'))
+            return {'objects': round(counter.objects, 2), 'backlog': round(backlog, 2), 'latency_ms': latency}
+
+        def on_share(fps):
+            if not fps:
+                return
+            # The share caps the detection rate; with a latency budget on, the
+            # budget also picks the model tier/imgsz whose detector time fits it
+            throttle.set_rate(fps, 'coordinator')
+            if budget:
+                budget.target = 1.0 / fps
+
+        CoordinatorClient(direction, load, on_share, port=args.coordinator_port).start()
+
+    # Start a thread to send vehicle count data
+    send_thread = threading.Thread(target=send_vehicle_count, args=(client, direction, counter, stats))
+    send_thread.daemon = True
+    send_thread.start()
+
+    # Micro-batching needs frames to queue up ahead of the detector
+    if args.batch_size > 1 and not args.pipelined:
+        logging.info(f"Batch size {args.batch_size} requested, running the pipelined loop")
+        args.pipelined = True
+
+    stage = None
+    try:
+        if args.pipelined:
+            def render(index, frame, boxes_ids):
+                frame = annotate(index, frame, boxes_ids)
+                if args.headless:
+                    return True
+                cv2.imshow(f"Frame - {direction}", frame)
+                return cv2.waitKey(1) != 27  # Press ESC to exit
+
+            pipeline = SlavePipeline(cap, detect, counter,
+                                     None if args.headless and not recorder else render,
+                                     queue_size=max(args.queue_size, args.batch_size), name=direction,
+                                     detect_batch=detect_batch,
+                                     batch_size=args.batch_size, batch_timeout=args.batch_timeout_ms / 1000,
+                                     on_frame=on_frame if budget or live else None,
+                                     render_policy=render_policy, timer=timer)
+            pipeline.run()
         else:
-            print("Attempting to reconnect...")
-            client.connect()
-        time.sleep(5)  # Send updates every 5 seconds
-
-# Start a thread to send vehicle count data
-send_thread = threading.Thread(target=send_vehicle_count)
-send_thread.daemon = True
-send_thread.start()
-
-def is_crossing_line(box, line_start, line_end):
-    x, y, w, h = box
-    cx, cy = (x + x + w) // 2, (y + y + h) // 2
-    line_dx, line_dy = line_end[0] - line_start[0], line_end[1] - line_start[1]
-    line_mag = np.sqrt(line_dx**2 + line_dy**2)
-    if line_mag == 0:
-        return False
-    u = ((cx - line_start[0]) * line_dx + (cy - line_start[1]) * line_dy) / line_mag
-    if u < 0 or u > line_mag:
-        return False
-    intersection = (line_start[0] + u * (line_dx / line_mag), line_start[1] + u * (line_dy / line_mag))
-    return np.abs(intersection[1] - cy) < 10  # Adjust this tolerance as needed
-
-try:
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        # Object detection
-        results = model(frame, conf=0.5)  # Adjust confidence threshold if needed
-        detections = []
-        for result in results:
-            boxes = result.boxes.xyxy.cpu().numpy()
-            scores = result.boxes.conf.cpu().numpy()
-            for box, score in zip(boxes, scores):
-                x1, y1, x2, y2 = map(int, box)
-                w, h = x2 - x1, y2 - y1
-                if w * h > 500:  # Adjust this threshold as needed
-                    detections.append([x1, y1, w, h])
-
-        # Update tracker with detections
-        boxes_ids = tracker.update(detections)
-
-        # Draw the results and detect line crossings
-        for box_id in boxes_ids:
-            x, y, w, h, id = box_id
-            cv2.putText(frame, str(id), (x, y - 15), cv2.FONT_HERSHEY_PLAIN, 2, (255, 0, 0), 2)
-            cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 3)
-            
-            # Check if the vehicle crosses the line segment
-            if line_start and line_end and id not in crossed_vehicles:
-                if is_crossing_line([x, y, w, h], line_start, line_end):
-                    vehicle_count += 1
-                    crossed_vehicles.add(id)
-
-        # Draw the counting line on the full frame
-        if line_start and line_end:
-            cv2.line(frame, line_start, line_end, (0, 0, 255), 3)
-
-        # Display the results
-        cv2.imshow("Frame", frame)
-        
-        # Print vehicle count
-        print(f"Vehicle Count: {vehicle_count}")
-
-        key = cv2.waitKey(30)
-        if key == 27:  # Press ESC to exit
-            break
-
-except KeyboardInterrupt:
-    print("Interrupted by user")
-
-finally:
-    cap.release()
-    cv2.destroyAllWindows()
-    client.close()
-    print("Cleaned up and exited")
\ No newline at end of file
+            # Overlays drawn by a separate stage, off the counting loop
+            if render_policy and (recorder or not args.headless):
+                stage = RenderStage(annotate, render_policy, copy=getattr(cap, 'reuses_buffers', False))
+                stats.append(stage.stats)
+
+            while True:
+                started = time.perf_counter()
+                timer.begin(counter.frames)
+                with timer.stage('read'):
+                    ret, frame = cap.read()
+                if not ret:
+                    break
+                if live:
+                    started = live.frame_time
+
+                with timer.stage('detect'):
+                    detections = detect(frame)
+
+                # Update tracker and detect line crossings
+                boxes_ids = counter.update(detections)
+                on_frame(counter.frames, time.perf_counter() - started)
+
+                if stage:
+                    stage.submit(counter.frames, frame, boxes_ids)
+                    if args.headless:
+                        continue
+                    with timer.stage('display'):
+                        keep_going = stage.show(f"Frame - {direction}")
+                    if not keep_going:
+                        break
+                    continue
+
+                # Headless slaves report only through the master socket and the log
+                if args.headless and not recorder:
+                    continue
+
+                # Draw the results and the counting line
+                with timer.stage('render'):
+                    draw_overlay(frame, boxes_ids, line_start, line_end, roi)
+                if recorder:
+                    recorder.write(frame)
+                if args.headless:
+                    continue
+
+                # Display the results
+                with timer.stage('display'):
+                    cv2.imshow(f"Frame - {direction}", frame)
+
+                # Print vehicle count
+                print(f"Vehicle Count ({direction}): {counter.vehicle_count}")
+
+                key = cv2.waitKey(30)
+                if key == 27:  # Press ESC to exit
+                    break
+
+    except KeyboardInterrupt:
+        print("Interrupted by user")
+    finally:
+        if stage:
+            stage.close()
+        cap.release()
+        if recorder:
+            recorder.close()
+        if not args.headless:
+            cv2.destroyAllWindows()
+        client.close()
+        logging.info(f"Stage ms p50/p95/p99 ({direction}): {timer.describe()}")
+        timer.close()
+        print(f"Cleaned up and exited ({direction})")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Traffic monitoring slave script")
+    parser.add_argument("direction", nargs="?", default="North", choices=["North", "South", "East", "West"], help="Direction of traffic flow")
+    parser.add_argument("video_path", nargs="?", default="/home/adityaa/Desktop/Smart India Hackathon/video samples/highway.mp4", help="Path to the video file")
+    parser.add_argument("--host", default="0.0.0.0", help="Host IP of the master server")
+    parser.add_argument("--port", type=int, default=5000, help="Port of the master server")
+    parser.add_argument("--model", default="yolov8x.pt", help="YOLOv8 weights")
+    parser.add_argument("--backend", choices=["torch", "onnx"], default="torch", help="Run the detector with ultralytics/PyTorch or ONNX Runtime")
+    parser.add_argument("--cascade-small", default=None, help="Small model (e.g. yolov8n.pt) to run first; --model then only sees uncertain regions")
+    parser.add_argument("--tile-size", type=int, default=0, help="Sliced inference with tiles of this size (0 = off)")
+    parser.add_argument("--tile-overlap", type=float, default=0.2, help="Overlap between neighbouring tiles, as a fraction")
+    parser.add_argument("--live", action="store_true", help="Replay the video at its native FPS like a camera, looping and dropping stale frames")
+    parser.add_argument("--live-buffer", type=int, default=1, help="Frames the live source buffers before dropping the oldest")
+    parser.add_argument("--shm-decode", action="store_true", help="Decode in a separate process and share frames through shared memory")
+    parser.add_argument("--threaded-decode", action="store_true", help="Decode the video in a background thread")
+    parser.add_argument("--decode-skip", type=int, default=1, help="Keep every n-th frame; the rest are grabbed but never converted")
+    parser.add_argument("--decode-width", type=int, default=None, help="Shrink frames to this width while decoding (lines are scaled to match)")
+    parser.add_argument("--line-file", default="line_start_end.txt", help="Counting line file")
+    parser.add_argument("--pipelined", action="store_true", help="Run capture, inference, tracking and rendering as separate stages")
+    parser.add_argument("--queue-size", type=int, default=4, help="Frames buffered between pipeline stages")
+    parser.add_argument("--batch-size", type=int, default=1, help="Frames per inference call (micro-batching)")
+    parser.add_argument("--batch-timeout-ms", type=float, default=50, help="Longest wait for a batch to fill, in ms")
+    parser.add_argument("--roi", action="store_true", help="Run the detector only on a padded crop around the counting line")
+    parser.add_argument("--roi-pad", type=int, default=150, help="Padding around the counting line for --roi, in pixels")
+    parser.add_argument("--motion-gate", choices=["diff", "mog2"], default=None, help="Skip inference on frames with no motion inside the ROI")
+    parser.add_argument("--motion-min-changed", type=float, default=0.002, help="Fraction of changed pixels that counts as motion")
+    parser.add_argument("--keyframe-interval", type=int, default=1, help="Run the detector every k frames and propagate boxes with optical flow in between")
+    parser.add_argument("--latency-budget-ms", type=float, default=0, help="Per-frame latency target; steps imgsz, frame skip and --budget-models to meet it (0 = off)")
+    parser.add_argument("--budget-models", nargs="*", default=[], help="Smaller weights the latency budget may fall back to, largest first (default: only --model)")
+    parser.add_argument("--record-dir", default=None, help="Record annotated frames as rolling video segments in this directory; only frames the overlay is drawn on (every --render-every-th, and with --render-on-demand only after SIGUSR1), encoded at the source FPS / --render-every")
+    parser.add_argument("--record-segment-s", type=float, default=60, help="Length of each recorded segment, in seconds of video")
+    parser.add_argument("--record-max-segments", type=int, default=10, help="Newest segments to keep (0 = keep all)")
+    parser.add_argument("--record-policy", choices=["drop", "decimate"], default="drop", help="What to do with frames when the encoder falls behind")
+    parser.add_argument("--render-every", type=int, default=1, help="Draw the overlay on every n-th frame only")
+    parser.add_argument("--render-scale", type=float, default=1.0, help="Draw the overlay on a copy shrunk by this factor")
+    parser.add_argument("--render-on-demand", action="store_true", help="Draw nothing until the slave receives SIGUSR1")
+    parser.add_argument("--timing-trace", default=None, help="Write every stage timing of every frame to this CSV file")
+    parser.add_argument("--coordinator-port", type=int, default=0, help="Port of the host's budget coordinator (0 = off)")
+    parser.add_argument("--headless", action="store_true", help="Skip drawing and windows; report counts and FPS only to the master and the log")
+    
+    args = parser.parse_args()
+    
+    main(args)
\ No newline at end of file
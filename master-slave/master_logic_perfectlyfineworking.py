@@ -19,6 +19,8 @@ class MasterServer:
         self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         self.sock.bind((self.host, self.port))
         self.clients = []
+        self.lane_clients = {}  # Lane -> socket of the slave reporting it, for control messages
+        self.on_lane_lost = None  # Called with the lane when its slave disconnects
         self.vehicle_counts = {}
 
     def start(self):
@@ -34,28 +36,52 @@ class MasterServer:
         self.clients.append(client)
         while True:
             try:
-                data = client.recv(1024)
+                data = client.recv(65536)  # Reports carry stage timings and other stats now
                 if not data:
                     break
                 message = json.loads(data.decode('utf-8'))
+                self.lane_clients[message['lane']] = client
                 self.update_vehicle_count(message)
             except Exception as e:
                 print(f"Error handling client: {e}")
                 break
         client.close()
         self.clients.remove(client)
+        for lane in [lane for lane, sock in self.lane_clients.items() if sock is client]:
+            del self.lane_clients[lane]
+            if self.on_lane_lost:
+                self.on_lane_lost(lane)
+
+    def send_control(self, lane, **settings):
+        # E.g. send_control('North', sample_fps=5); slaves that never reported are skipped
+        client = self.lane_clients.get(lane)
+        if client is None:
+            return False
+        try:
+            client.sendall((json.dumps({'lane': lane, **settings}) + "\n").encode('utf-8'))
+            return True
+        except Exception as e:
+            print(f"Failed to send control message to {lane}: {e}")
+            return False
 
     def update_vehicle_count(self, message):
         lane = message['lane']
         count = message['count']
         self.vehicle_counts[lane] = count
-        print(f"Updated vehicle count for {lane}: {count}")
+        if 'fps' in message:
+            print(f"Updated vehicle count for {lane}: {count} ({message['fps']} FPS)")
+        else:
+            print(f"Updated vehicle count for {lane}: {count}")
+        if 'stage_ms_p50_p95_p99' in message:
+            timings = ", ".join(f"{stage} {p95}" for stage, (p50, p95, p99) in message['stage_ms_p50_p95_p99'].items())
+            print(f"Stage p95 ms for {lane}: {timings}")
 
     def get_vehicle_counts(self):
         return self.vehicle_counts
 
 class TrafficSignalController:
-    def __init__(self, lanes, update_signal_callback, update_progress_callback, total_cycle_time=120):
+    def __init__(self, lanes, update_signal_callback, update_progress_callback, total_cycle_time=120,
+                 sampling_callback=None, lead_time=15, high_fps=0, low_fps=5):
         self.lanes = lanes
         self.update_signal_callback = update_signal_callback
         self.update_progress_callback = update_progress_callback
@@ -68,6 +94,14 @@ class TrafficSignalController:
         self.historical_data = []
         self.running = True
         self.debug_mode = False
+        # Detection duty cycling: the green lane, and the lanes whose count is
+        # read at the next decision for the last lead_time seconds before it,
+        # sample at high_fps (0 = every frame); every other lane at low_fps
+        self.sampling_callback = sampling_callback  # (lane, sample_fps=...) -> sent to that lane's slave
+        self.lead_time = lead_time
+        self.high_fps = high_fps
+        self.low_fps = low_fps
+        self.sample_rates = {}
 
     def calculate_total_vehicle_count(self, active_lanes):
         return sum(self.lanes[lane] for lane in active_lanes)
@@ -91,6 +125,25 @@ class TrafficSignalController:
         sorted_lanes = sorted(active_lanes, key=lambda lane: self.lanes[lane], reverse=True)
         return sorted_lanes[0]
 
+    def update_sampling(self, green_lane, remaining):
+        if not self.sampling_callback:
+            return
+        # The next decision reads the lanes still active once this green ends
+        next_lanes = [lane for lane in self.get_active_lanes() if lane != green_lane]
+        if not next_lanes:
+            next_lanes = [lane for lane in self.lanes if lane != green_lane]
+        for lane in self.lanes:
+            # Counts are cumulative, so the lane whose traffic is moving now is never throttled
+            busy = lane == green_lane or (lane in next_lanes and remaining <= self.lead_time)
+            rate = self.high_fps if busy else self.low_fps
+            if self.sample_rates.get(lane) != rate and self.sampling_callback(lane, sample_fps=rate):
+                self.sample_rates[lane] = rate
+                logging.info(f"Sampling rate for {lane}: {rate or 'full'} FPS")
+
+    def reset_sampling(self, lane):
+        # A restarted slave comes back at full rate; forget what it was sent so it is sent again
+        self.sample_rates.pop(lane, None)
+
     def update_signals(self, remaining_time, prompt_vehicle_counts):
         green_lane = self.find_highest_priority_lane()
         if not green_lane:
@@ -104,6 +157,7 @@ class TrafficSignalController:
                 return 0
             self.update_signal_callback(green_lane, "green", remaining)
             self.update_progress_callback(green_lane, remaining, allocated_time)
+            self.update_sampling(green_lane, remaining)
             if remaining <= 5:
                 self.start_blinking(green_lane)
             time.sleep(1)
@@ -448,4 +502,6 @@ if __name__ == "__main__":
     gui = TrafficSignalGUI(root, controller)
     controller.update_signal_callback = gui.update_signal
     controller.update_progress_callback = gui.update_progress
+    controller.sampling_callback = gui.master_server.send_control
+    gui.master_server.on_lane_lost = controller.reset_sampling
     root.mainloop()
\ No newline at end of file
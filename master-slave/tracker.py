@@ -1,11 +1,13 @@
 import math
 
 class EuclideanDistTracker:
-    def __init__(self):
+    def __init__(self, max_distance=30):
         # Store the center positions of the objects
         self.center_points = {}
         # Keep the count of the IDs
         self.id_count = 0
+        # Largest centre movement between frames that is still the same object
+        self.max_distance = max_distance
 
     def update(self, objects_rect):
         # Objects boxes and ids
@@ -22,7 +24,7 @@ class EuclideanDistTracker:
             for id, pt in self.center_points.items():
                 dist = math.hypot(cx - pt[0], cy - pt[1])
 
-                if dist < 30:  # Adjust distance threshold if needed
+                if dist < self.max_distance:  # Adjust distance threshold if needed
                     self.center_points[id] = (cx, cy)
                     objects_bbs_ids.append([x, y, w, h, id])
                     same_object_detected = True
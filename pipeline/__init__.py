@@ -0,0 +1 @@
+# Shared building blocks for the slave scripts (master-slave, master-slave copy/slaveNN)
@@ -0,0 +1,51 @@
+import collections
+
+
+def percentile(values, pct):
+    # Nearest-rank percentile, good enough for log summaries
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def detect_selected(frames, selected, detect_batch, last=None):
+    # One detect_batch call for the selected frames; every other frame repeats the detections before it
+    results = iter(detect_batch([frame for frame, pick in zip(frames, selected) if pick]) if any(selected) else [])
+    detections = []
+    for pick in selected:
+        if pick:
+            last = next(results)
+        detections.append(last)
+    return detections
+
+
+class BatchStats:
+    """Throughput versus latency of micro-batched inference."""
+
+    def __init__(self, window=500):
+        self.batches = 0
+        self.frames = 0
+        self.busy = 0.0  # Seconds spent inside the detector
+        self.latencies = collections.deque(maxlen=window)  # Seconds from dequeue to detections
+
+    def add(self, size, busy, latencies):
+        self.batches += 1
+        self.frames += size
+        self.busy += busy
+        self.latencies.extend(latencies)
+
+    def summary(self):
+        latencies = list(self.latencies)
+        return {
+            'avg_batch': self.frames / self.batches if self.batches else 0.0,
+            'throughput_fps': self.frames / self.busy if self.busy else 0.0,
+            'latency_p50_ms': percentile(latencies, 50) * 1000,
+            'latency_p95_ms': percentile(latencies, 95) * 1000,
+        }
+
+    def describe(self):
+        s = self.summary()
+        return (f"batch avg {s['avg_batch']:.1f}, detector {s['throughput_fps']:.1f} FPS, "
+                f"latency p50 {s['latency_p50_ms']:.0f} ms / p95 {s['latency_p95_ms']:.0f} ms")
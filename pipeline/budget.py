@@ -0,0 +1,128 @@
+import collections
+import logging
+import time
+
+from pipeline.detection import detect_vehicles, detect_vehicles_batch
+from pipeline.keyframe import KeyframeDetector
+
+# Input sizes the budget steps through before it starts skipping frames
+IMGSZ_STEPS = (1280, 960, 640, 480)
+
+
+def build_ladder(model, smaller=(), max_skip=4):
+    """(model, imgsz, frame skip) rungs for the slave's own weights, most accurate first.
+
+    The model steps down through IMGSZ_STEPS and then frame skip 2. Smaller
+    weights are only used when given (largest first); the cheapest model
+    then goes on skipping up to max_skip.
+    """
+    low = IMGSZ_STEPS[-1]
+    ladder = [(model, imgsz, 1) for imgsz in IMGSZ_STEPS]
+    ladder += [(name, low, min(2, max_skip)) for name in (model, *smaller)]
+    ladder += [(ladder[-1][0], low, skip) for skip in range(3, max_skip + 1)]
+    return list(dict.fromkeys(ladder))  # With max_skip 1, (model, low, 1) would appear twice
+
+
+def describe_setting(setting):
+    model, imgsz, skip = setting
+    return f"{model} imgsz={imgsz} skip={skip}"
+
+
+class LatencyBudget:
+    """Feedback controller that keeps per-frame end-to-end latency under a target.
+
+    Once `window` frames have been seen since the last change, their mean
+    latency is compared with the target: above it the controller steps one
+    rung down the ladder, below `relax` times the target it steps back up.
+    The mean, not the median, so that on skip rungs the frames that ran the
+    detector count as much as the cheap ones that reused its boxes.
+    """
+
+    def __init__(self, target, ladder, start=0, window=30, relax=0.6, name="slave"):
+        self.target = target  # Seconds
+        self.ladder = ladder
+        self.level = start
+        self.window = window
+        self.relax = relax
+        self.name = name
+        self.latencies = collections.deque(maxlen=window)
+
+    @property
+    def setting(self):
+        return self.ladder[self.level]
+
+    def observe(self, latency):
+        self.latencies.append(latency)
+        if len(self.latencies) < self.window:
+            return
+        mean = self.mean()
+        if mean > self.target and self.level < len(self.ladder) - 1:
+            self._move(1, mean)
+        elif mean < self.target * self.relax and self.level > 0:
+            self._move(-1, mean)
+
+    def mean(self):
+        # Cost per frame over the window: total latency / frames
+        return sum(self.latencies) / len(self.latencies) if self.latencies else 0.0
+
+    def _move(self, step, mean):
+        old = self.setting
+        self.level += step
+        self.latencies.clear()  # Judge the new setting on its own frames
+        logging.info(f"Latency budget ({self.name}): mean {mean * 1000:.0f} ms vs target "
+                     f"{self.target * 1000:.0f} ms, {describe_setting(old)} -> {describe_setting(self.setting)}")
+
+    def stats(self):
+        return {'setting': describe_setting(self.setting),
+                'latency_ms': round(self.mean() * 1000, 1)}
+
+
+class BudgetedDetector(KeyframeDetector):
+    """Detects with whatever model, imgsz and frame skip the budget currently allows.
+
+    Skipped frames have the last boxes moved along with optical flow, as in
+    KeyframeDetector, since the budget skips frames with moving traffic too.
+    With observe set, the budget is fed the detector's own time per frame
+    instead of the slave's end-to-end latency; that is what matters when
+    something else (the coordinator's share) already caps how often it runs.
+    """
+
+    def __init__(self, budget, load_model, roi=None, models=None, timer=None, observe=False, min_area=500):
+        super().__init__(self._detect, 1, self._detect_batch)
+        self.budget = budget
+        self.load_model = load_model  # weights name -> model, e.g. YOLO
+        self.models = models or {}  # Already loaded models by weights name
+        self.roi = roi
+        self.timer = timer  # StageTimer for the model and postprocess stages
+        self.observe = observe
+        self.min_area = min_area
+
+    def model(self, name):
+        if name not in self.models:
+            logging.info(f"Loading {name} for the latency budget")
+            self.models[name] = self.load_model(name)
+        return self.models[name]
+
+    def due(self, count):
+        skip = self.budget.setting[2]
+        return [(self.index + i) % skip == 0 or (i == 0 and self.prev_gray is None) for i in range(count)]
+
+    def propagating(self):
+        return self.budget.setting[2] > 1
+
+    def _detect(self, frame):
+        return self._detect_batch([frame])[0]
+
+    def _detect_batch(self, frames):
+        name, imgsz, _ = self.budget.setting
+        started = time.perf_counter()
+        if len(frames) == 1:
+            results = [detect_vehicles(self.model(name), frames[0], self.roi, imgsz, self.timer, self.min_area)]
+        else:
+            results = detect_vehicles_batch(self.model(name), frames, [self.roi] * len(frames), imgsz, self.timer,
+                                            self.min_area)
+        if self.observe:
+            per_frame = (time.perf_counter() - started) / len(frames)
+            for _ in frames:
+                self.budget.observe(per_frame)
+        return results
@@ -0,0 +1,97 @@
+import collections
+
+import numpy as np
+
+from pipeline.detection import box_iou, nms, predict_arrays
+from pipeline.roi import crop
+
+
+def merge_regions(rects):
+    # Union overlapping [x1, y1, x2, y2] rectangles until none overlap
+    rects = [list(r) for r in rects]
+    merged = True
+    while merged:
+        merged = False
+        out = []
+        for r in rects:
+            for o in out:
+                if r[0] < o[2] and o[0] < r[2] and r[1] < o[3] and o[1] < r[3]:
+                    o[:] = [min(r[0], o[0]), min(r[1], o[1]), max(r[2], o[2]), max(r[3], o[3])]
+                    merged = True
+                    break
+            else:
+                out.append(r)
+        rects = out
+    return rects
+
+
+class CascadeDetector:
+    """Nano model on the whole frame, large model only where the nano model is unsure.
+
+    Boxes the small model finds with conf >= `accept` that don't overlap
+    their neighbours are kept as they are. Low-confidence or crowded boxes
+    are grown by `margin`, merged into regions, and all regions in the batch
+    go through the large model as one call. Inside a region the large
+    model's boxes replace the small model's.
+    """
+
+    def __init__(self, small, large, accept=0.5, low=0.15, crowd_iou=0.3, margin=0.5, min_region=96, history=300):
+        self.small = small
+        self.large = large
+        self.names = large.names
+        self.accept = accept
+        self.low = low  # Small-model boxes below this are ignored entirely
+        self.crowd_iou = crowd_iou
+        self.margin = margin
+        self.min_region = min_region  # Smallest crop side handed to the large model, in pixels
+        self.large_area = collections.deque(maxlen=history)  # Fraction of each frame sent to the large model
+
+    def _regions(self, xyxy, conf, shape):
+        height, width = shape[:2]
+        iou = box_iou(xyxy, xyxy)
+        np.fill_diagonal(iou, 0)
+        crowded = (iou > self.crowd_iou).any(axis=1) if len(xyxy) else np.zeros(0, dtype=bool)
+        unsure = (conf < self.accept) | crowded
+        rects = []
+        for x1, y1, x2, y2 in xyxy[unsure]:
+            grow_x = max((x2 - x1) * self.margin, (self.min_region - (x2 - x1)) / 2, 0)
+            grow_y = max((y2 - y1) * self.margin, (self.min_region - (y2 - y1)) / 2, 0)
+            rects.append([max(0, int(x1 - grow_x)), max(0, int(y1 - grow_y)),
+                          min(width, int(x2 + grow_x)), min(height, int(y2 + grow_y))])
+        return merge_regions(rects), unsure
+
+    def predict_arrays(self, images, conf=0.5, imgsz=None):
+        small = predict_arrays(self.small, images, imgsz, self.low)
+
+        # Collect every unsure region in the batch for one large-model call
+        plans, crops = [], []
+        for image, (xyxy, scores, cls) in zip(images, small):
+            regions, unsure = self._regions(xyxy, scores, image.shape)
+            plans.append((regions, unsure))
+            crops += [crop(image, region) for region in regions]
+        large = iter(predict_arrays(self.large, crops, imgsz, conf) if crops else [])
+
+        outputs = []
+        for image, (xyxy, scores, cls), (regions, unsure) in zip(images, small, plans):
+            keep = ~unsure & (scores >= conf)
+            centres = (xyxy[:, :2] + xyxy[:, 2:]) / 2
+            parts = []
+            for x1, y1, x2, y2 in regions:
+                # The large model is authoritative inside its regions
+                inside = (centres[:, 0] >= x1) & (centres[:, 0] < x2) & (centres[:, 1] >= y1) & (centres[:, 1] < y2)
+                keep &= ~inside
+                r_xyxy, r_conf, r_cls = next(large)
+                parts.append((r_xyxy + np.array([x1, y1, x1, y1], dtype=np.float32), r_conf, r_cls))
+            parts.append((xyxy[keep], scores[keep], cls[keep]))
+            merged = [np.concatenate(column) for column in zip(*parts)]
+            chosen = nms(merged[0], merged[1], 0.7, merged[2])
+            outputs.append(tuple(column[chosen] for column in merged))
+
+            area = sum((x2 - x1) * (y2 - y1) for x1, y1, x2, y2 in regions)
+            self.large_area.append(area / float(image.shape[0] * image.shape[1]))
+        return outputs
+
+    def stats(self):
+        recent = list(self.large_area)
+        return {'large_area': round(recent[-1], 3) if recent else 0.0,
+                'large_area_avg': round(sum(recent) / len(recent), 3) if recent else 0.0}
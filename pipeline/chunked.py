@@ -0,0 +1,62 @@
+import logging
+
+import cv2
+
+from pipeline.counting import LaneCounter
+from pipeline.detection import detect_vehicles
+
+
+def chunk_ranges(frame_count, chunks, overlap):
+    """Split [0, frame_count) into (warm_start, start, end) chunks.
+
+    Each chunk owns [start, end) and also replays the `overlap` frames
+    before start, so its tracker is warmed up on the vehicles already in
+    view when its own frames begin.
+    """
+    chunks = max(1, min(chunks, frame_count))
+    bounds = [frame_count * i // chunks for i in range(chunks + 1)]
+    return [(max(0, start - overlap), start, end) for start, end in zip(bounds, bounds[1:])]
+
+
+def count_chunk(model, video_path, line, warm_start, start, end, tracker, roi=None, imgsz=None):
+    """Track and count frames warm_start..end of a video.
+
+    Returns the (frame, crossings) events. Events before `start` belong to the
+    previous chunk; they are only used to check the stitch.
+    """
+    cap = cv2.VideoCapture(video_path)
+    cap.set(cv2.CAP_PROP_POS_FRAMES, warm_start)
+    counter = LaneCounter(tracker, *line)
+    events = []
+    for index in range(warm_start, end):
+        ret, frame = cap.read()
+        if not ret:
+            break
+        before = counter.vehicle_count
+        counter.update(detect_vehicles(model, frame, roi, imgsz))
+        if counter.vehicle_count > before:
+            events.append((index, counter.vehicle_count - before))
+    cap.release()
+    return events
+
+
+def stitch(chunks, lane=""):
+    """Total the crossings each chunk owns and check the overlaps agree.
+
+    chunks is a list of ((warm_start, start, end), events) in order. Inside
+    an overlap both neighbours track the same vehicles; once the later
+    chunk's fresh tracker has caught up, their events must match. A
+    mismatch in the second half of the overlap means it is too short.
+    """
+    total = 0
+    for k, ((warm_start, start, end), events) in enumerate(chunks):
+        total += sum(n for index, n in events if start <= index < end)
+        if k == 0 or warm_start == start:
+            continue
+        settled = (warm_start + start) // 2
+        previous = [(i, n) for i, n in chunks[k - 1][1] if settled <= i < start]
+        mine = [(i, n) for i, n in events if settled <= i < start]
+        if previous != mine:
+            logging.warning(f"Chunk boundary at frame {start} ({lane}) disagrees in the overlap: "
+                            f"{previous} vs {mine}; use more overlap frames")
+    return total
@@ -0,0 +1,77 @@
+import json
+import logging
+import socket
+import threading
+import time
+
+
+class SlaveClient:
+    def __init__(self, host='localhost', port=5000, on_control=None):
+        self.host = host
+        self.port = port
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.connected = False
+        self.on_control = on_control  # Called with each control message the master sends
+
+    def connect(self):
+        try:
+            self.sock.connect((self.host, self.port))
+            self.connected = True
+            print(f"Connected to master server at {self.host}:{self.port}")
+            if self.on_control:
+                threading.Thread(target=self.receive_control, daemon=True).start()
+        except Exception as e:
+            print(f"Failed to connect to master server: {e}")
+
+    def receive_control(self):
+        # Control messages from the master are newline-delimited JSON
+        buffer = b""
+        while self.connected:
+            try:
+                data = self.sock.recv(4096)
+            except Exception as e:
+                print(f"Failed to receive from master server: {e}")
+                break
+            if not data:
+                break
+            buffer += data
+            while b"\n" in buffer:
+                line, buffer = buffer.split(b"\n", 1)
+                try:
+                    self.on_control(json.loads(line.decode('utf-8')))
+                except Exception as e:
+                    logging.warning(f"Ignoring control message {line!r}: {e}")
+
+    def send_vehicle_count(self, lane, count, **stats):
+        if not self.connected:
+            print("Not connected to master server")
+            return
+        message = json.dumps({'lane': lane, 'count': count, **stats})
+        try:
+            self.sock.sendall(message.encode('utf-8'))
+        except Exception as e:
+            print(f"Failed to send data to master server: {e}")
+            self.connected = False
+
+    def close(self):
+        self.sock.close()
+
+
+def send_vehicle_count(client, lane, counter, stats=()):
+    # stats: callables returning small dicts that ride along in the log line and the report
+    last_frames, last_time = 0, time.time()
+    while True:
+        now = time.time()
+        fps = (counter.frames - last_frames) / (now - last_time) if now > last_time else 0.0
+        last_frames, last_time = counter.frames, now
+        extra = {}
+        for source in stats:
+            extra.update(source())
+        details = "".join(f", {key}: {value}" for key, value in extra.items())
+        logging.info(f"Vehicle Count ({lane}): {counter.vehicle_count}, FPS: {fps:.1f}{details}")
+        if client.connected:
+            client.send_vehicle_count(lane, counter.vehicle_count, fps=round(fps, 1), **extra)
+        else:
+            print("Attempting to reconnect...")
+            client.connect()
+        time.sleep(5)  # Send updates every 5 seconds
@@ -0,0 +1,151 @@
+import json
+import logging
+import math
+import socket
+import threading
+import time
+
+
+class BudgetCoordinator:
+    """Splits a host-wide detector FPS budget between co-located slaves.
+
+    Slaves connect over localhost and send their load as JSON lines
+    (objects per frame, queue backlog, detect latency); every reply carries
+    their current share. Shares follow demand: each lane's weight is one
+    plus its objects per frame, raised further while its queue is backing
+    up, with at least min_fps each. A lane whose detect latency cannot
+    sustain its share is capped at what it can do and the rest is shared
+    out among the others. Shares never add up to more than total_fps: when
+    min_fps for every lane does not fit, the floors are scaled down.
+    """
+
+    def __init__(self, total_fps, host='localhost', port=5100, min_fps=1.0, interval=5.0):
+        self.total_fps = total_fps
+        self.host = host
+        self.port = port
+        self.min_fps = min_fps
+        self.interval = interval
+        self.loads = {}  # Lane -> latest load report
+        self.shares = {}  # Lane -> allocated FPS
+        self.short = False  # Whether min_fps for every lane exceeds the budget (warned once)
+        self.lock = threading.Lock()
+
+    def allocate(self):
+        with self.lock:
+            loads = dict(self.loads)
+        if not loads:
+            return
+        weights = {lane: (1.0 + load.get('objects', 0.0)) * (1.0 + load.get('backlog', 0.0))
+                   for lane, load in loads.items()}
+        capacity = {lane: 1000.0 / load['latency_ms'] if load.get('latency_ms') else float('inf')
+                    for lane, load in loads.items()}
+        if self.min_fps * len(weights) > self.total_fps:
+            if not self.short:
+                logging.warning(f"{len(weights)} slaves at min_fps {self.min_fps} need more than the "
+                                f"{self.total_fps} FPS budget; scaling the floors down")
+            self.short = True
+        else:
+            self.short = False
+        shares, budget = {}, self.total_fps
+        while weights:
+            # Floors shrink to an equal split when they do not fit; proposals always add up to the budget
+            floor = min(self.min_fps, budget / len(weights))
+            spare = budget - floor * len(weights)
+            total_weight = sum(weights.values())
+            proposal = {lane: floor + spare * weight / total_weight for lane, weight in weights.items()}
+            capped = [lane for lane in weights if proposal[lane] > capacity[lane]]
+            if not capped:
+                shares.update(proposal)
+                break
+            # A lane that cannot go faster gets what it can do, never more; the rest goes to the others
+            for lane in capped:
+                shares[lane] = capacity[lane]
+                budget -= shares[lane]
+                del weights[lane]
+        shares = {lane: math.floor(share * 10) / 10 for lane, share in shares.items()}  # Rounded down, never over
+        with self.lock:
+            self.shares = shares
+        logging.info("Allocation: " + ", ".join(
+            f"{lane} {shares[lane]} FPS ({loads[lane].get('objects', 0):.1f} objects, "
+            f"backlog {loads[lane].get('backlog', 0):.2f}, detect p95 {loads[lane].get('latency_ms', 0):.0f} ms)"
+            for lane in sorted(shares)))
+
+    def handle(self, conn):
+        lane = None
+        with conn, conn.makefile('rwb') as stream:
+            for line in stream:
+                try:
+                    load = json.loads(line.decode('utf-8'))
+                except ValueError:
+                    continue
+                lane = load['lane']
+                with self.lock:
+                    new = lane not in self.loads
+                    self.loads[lane] = load
+                if new:
+                    self.allocate()
+                with self.lock:
+                    share = self.shares.get(lane)
+                stream.write((json.dumps({'fps': share}) + "\n").encode('utf-8'))
+                stream.flush()
+        if lane is not None:
+            with self.lock:
+                self.loads.pop(lane, None)
+            logging.info(f"Slave {lane} left the budget")
+
+    def _reallocate(self):
+        while True:
+            time.sleep(self.interval)
+            self.allocate()
+
+    def serve(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(8)
+        logging.info(f"Budget coordinator on {self.host}:{self.port}, {self.total_fps} FPS to share")
+        threading.Thread(target=self._reallocate, daemon=True).start()
+        while True:
+            conn, _ = sock.accept()
+            threading.Thread(target=self.handle, args=(conn,), daemon=True).start()
+
+
+class CoordinatorClient:
+    """Slave side: reports load to the coordinator and applies its share.
+
+    load() returns the report dict; on_share(fps) is called whenever the
+    allocated FPS changes.
+    """
+
+    def __init__(self, lane, load, on_share, host='localhost', port=5100, interval=5.0):
+        self.lane = lane
+        self.load = load
+        self.on_share = on_share
+        self.host = host
+        self.port = port
+        self.interval = interval
+        self.share = None
+
+    def start(self):
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def run(self):
+        while True:
+            try:
+                with socket.create_connection((self.host, self.port), timeout=10) as conn, \
+                        conn.makefile('rwb') as stream:
+                    while True:
+                        stream.write((json.dumps({'lane': self.lane, **self.load()}) + "\n").encode('utf-8'))
+                        stream.flush()
+                        reply = stream.readline()
+                        if not reply:
+                            break
+                        share = json.loads(reply.decode('utf-8')).get('fps')
+                        if share != self.share:
+                            self.share = share
+                            logging.info(f"Budget ({self.lane}): allocated {share} FPS")
+                            self.on_share(share)
+                        time.sleep(self.interval)
+            except OSError as e:
+                logging.warning(f"Budget coordinator unreachable ({self.lane}): {e}")
+            time.sleep(self.interval)
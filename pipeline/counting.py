@@ -0,0 +1,56 @@
+import numpy as np
+
+from pipeline.timing import timed
+
+
+def load_line(path):
+    # Read the counting line saved by calibrate.py
+    with open(path, "r") as f:
+        line_start = tuple(map(int, f.readline().strip().split(',')))
+        line_end = tuple(map(int, f.readline().strip().split(',')))
+    return line_start, line_end
+
+
+def is_crossing_line(box, line_start, line_end, tolerance=10):
+    x, y, w, h = box
+    cx, cy = (x + x + w) // 2, (y + y + h) // 2
+    line_dx, line_dy = line_end[0] - line_start[0], line_end[1] - line_start[1]
+    line_mag = np.sqrt(line_dx**2 + line_dy**2)
+    if line_mag == 0:
+        return False
+    u = ((cx - line_start[0]) * line_dx + (cy - line_start[1]) * line_dy) / line_mag
+    if u < 0 or u > line_mag:
+        return False
+    intersection = (line_start[0] + u * (line_dx / line_mag), line_start[1] + u * (line_dy / line_mag))
+    return np.abs(intersection[1] - cy) < tolerance  # Adjust this tolerance as needed
+
+
+class LaneCounter:
+    """Tracker plus line-crossing count for one approach."""
+
+    def __init__(self, tracker, line_start, line_end, tolerance=10, timer=None):
+        self.tracker = tracker
+        self.line_start = line_start
+        self.line_end = line_end
+        self.tolerance = tolerance  # Pixels from the line that still count as crossing
+        self.timer = timer  # StageTimer for the track and count stages
+        self.vehicle_count = 0
+        self.crossed_vehicles = set()  # To store IDs of vehicles that have crossed the line
+        self.frames = 0  # Frames processed so far, used for FPS reporting
+        self.objects = 0.0  # Moving average of tracked objects per frame, a measure of load
+
+    def update(self, detections):
+        # Update tracker with detections
+        with timed(self.timer, 'track'):
+            boxes_ids = self.tracker.update(detections)
+        self.frames += 1
+        self.objects += 0.05 * (len(boxes_ids) - self.objects)
+
+        # Check if any vehicle crosses the line segment
+        with timed(self.timer, 'count'):
+            for x, y, w, h, id in boxes_ids:
+                if self.line_start and self.line_end and id not in self.crossed_vehicles:
+                    if is_crossing_line([x, y, w, h], self.line_start, self.line_end, self.tolerance):
+                        self.vehicle_count += 1
+                        self.crossed_vehicles.add(id)
+        return boxes_ids
@@ -0,0 +1,78 @@
+import json
+import os
+
+import numpy as np
+
+from pipeline.detection import filter_detections
+
+# One flat binary file per column, memory-mapped on read. Row i of every
+# column is one detection; offsets[f]:offsets[f + 1] are the rows of frame f.
+COLUMNS = {
+    'frame': (np.int32, ()),
+    'xyxy': (np.float32, (4,)),
+    'conf': (np.float32, ()),
+    'cls': (np.int16, ()),
+}
+
+
+class DetectionCacheWriter:
+    """Appends raw per-frame detections to a cache directory, column by column."""
+
+    def __init__(self, path, **meta):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.meta = meta  # Video, model, imgsz, class names... saved in meta.json
+        self.files = {name: open(os.path.join(path, name + '.bin'), 'wb') for name in COLUMNS}
+        self.offsets = [0]
+
+    def add(self, xyxy, conf, cls):
+        # Detections of the next frame, as returned by predict_arrays
+        frame = len(self.offsets) - 1
+        columns = {'frame': np.full(len(conf), frame), 'xyxy': xyxy, 'conf': conf, 'cls': cls}
+        for name, (dtype, _) in COLUMNS.items():
+            self.files[name].write(np.ascontiguousarray(columns[name], dtype=dtype).tobytes())
+        self.offsets.append(self.offsets[-1] + len(conf))
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+        np.asarray(self.offsets, dtype=np.int64).tofile(os.path.join(self.path, 'offsets.bin'))
+        self.meta.update(frames=len(self.offsets) - 1, detections=self.offsets[-1])
+        with open(os.path.join(self.path, 'meta.json'), 'w') as f:
+            json.dump(self.meta, f, indent=2)
+
+
+class DetectionCache:
+    """Read side of a cache directory; columns stay on disk until touched."""
+
+    def __init__(self, path):
+        with open(os.path.join(path, 'meta.json')) as f:
+            self.meta = json.load(f)
+        self.offsets = np.fromfile(os.path.join(path, 'offsets.bin'), dtype=np.int64)
+        self.columns = {}
+        for name, (dtype, shape) in COLUMNS.items():
+            rows = self.meta['detections']
+            self.columns[name] = (np.memmap(os.path.join(path, name + '.bin'), dtype=dtype, mode='r',
+                                            shape=(rows,) + shape) if rows else np.empty((0,) + shape, dtype))
+
+    @property
+    def names(self):
+        # json turns the {id: name} keys into strings
+        return {int(id): name for id, name in self.meta.get('names', {}).items()}
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def frame(self, index):
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return (self.columns['xyxy'][start:end], self.columns['conf'][start:end],
+                self.columns['cls'][start:end])
+
+
+def replay(cache, counter, classes=None, min_conf=0.0, min_area=500, frames=None):
+    # Feed cached detections through the same filtering, tracking and counting as the slaves
+    for index in range(min(len(cache), frames or len(cache))):
+        xyxy, conf, cls = cache.frame(index)
+        boxes, _ = filter_detections(xyxy, conf, cls, classes, min_conf, min_area)
+        counter.update(boxes.tolist())
+    return counter.vehicle_count
@@ -0,0 +1,115 @@
+import numpy as np
+
+from pipeline.roi import crop, to_frame_coords
+from pipeline.timing import timed
+
+# Class names counted as vehicles: COCO (yolov8*.pt) and the Indian roads dataset (best.pt)
+VEHICLE_NAMES = {'car', 'motorcycle', 'bus', 'truck', 'auto', 'carts', 'rikshaw', 'two-wheeler'}
+
+
+def vehicle_class_ids(names):
+    # names is the model's {id: name} mapping, e.g. model.names
+    return [id for id, name in names.items() if name.lower() in VEHICLE_NAMES]
+
+
+def filter_detections(xyxy, conf, cls=None, classes=None, min_conf=0.0, min_area=500):
+    """Class, confidence and area filtering plus xyxy -> xywh on whole arrays.
+
+    Returns (boxes, scores): an int32 (N, 4) array of [x, y, w, h] and the
+    matching float32 confidences.
+    """
+    corners = xyxy.astype(np.int32)  # Truncates like int() did per box
+    wh = corners[:, 2:] - corners[:, :2]
+    keep = (conf > min_conf) & (wh[:, 0] * wh[:, 1] > min_area)
+    if classes is not None and cls is not None:
+        keep &= np.isin(cls.astype(np.int32), classes)
+    boxes = np.concatenate([corners[keep, :2], wh[keep]], axis=1)
+    return boxes, conf[keep].astype(np.float32)
+
+
+def filter_result(result, classes=None, min_conf=0.0, min_area=500):
+    # One device -> numpy transfer per array instead of per box
+    boxes = result.boxes
+    return filter_detections(boxes.xyxy.cpu().numpy(), boxes.conf.cpu().numpy(), boxes.cls.cpu().numpy(),
+                             classes=classes, min_conf=min_conf, min_area=min_area)
+
+
+def box_iou(a, b):
+    # Pairwise IoU of (N, 4) and (M, 4) x1, y1, x2, y2 arrays -> (N, M)
+    top_left = np.maximum(a[:, None, :2], b[None, :, :2])
+    bottom_right = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+    area_a = np.prod(a[:, 2:] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:] - b[:, :2], axis=1)
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+
+def box_ios(a, b):
+    # Pairwise intersection over the smaller box -> (N, M); catches boxes cut off at tile edges
+    top_left = np.maximum(a[:, None, :2], b[None, :, :2])
+    bottom_right = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+    area_a = np.prod(a[:, 2:] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:] - b[:, :2], axis=1)
+    return inter / np.maximum(np.minimum(area_a[:, None], area_b[None, :]), 1e-9)
+
+
+def nms(xyxy, scores, iou=0.7, cls=None, metric=box_iou):
+    """Greedy non-maximum suppression, per class when cls is given. Returns kept indices."""
+    if not len(xyxy):
+        return np.empty(0, dtype=np.int64)
+    boxes = xyxy.astype(np.float32)
+    if cls is not None:
+        # Shift each class to its own region so boxes of different classes never overlap
+        boxes = boxes + (cls.astype(np.float32) * (boxes.max() + 1))[:, None]
+    order = np.argsort(-scores)
+    keep = []
+    while len(order):
+        best = order[0]
+        keep.append(best)
+        if len(order) == 1:
+            break
+        overlap = metric(boxes[best:best + 1], boxes[order[1:]])[0]
+        order = order[1:][overlap <= iou]
+    return np.array(keep, dtype=np.int64)
+
+
+def _predict_args(imgsz, conf=0.5):  # Adjust confidence threshold if needed
+    # Leave imgsz to the model's default unless a size is asked for
+    return {'conf': conf} if imgsz is None else {'conf': conf, 'imgsz': imgsz}
+
+
+def predict_arrays(model, images, imgsz=None, conf=0.5):
+    """Run any detector backend on a list of images.
+
+    Returns one (xyxy, conf, cls) tuple of numpy arrays per image. Backends
+    other than ultralytics (see pipeline/onnx_backend.py) provide their own
+    predict_arrays method.
+    """
+    if hasattr(model, 'predict_arrays'):
+        return model.predict_arrays(images, **_predict_args(imgsz, conf))
+    results = model(images, **_predict_args(imgsz, conf))
+    return [(r.boxes.xyxy.cpu().numpy(), r.boxes.conf.cpu().numpy(), r.boxes.cls.cpu().numpy()) for r in results]
+
+
+def _frame_detections(arrays, classes, roi, min_area=500):
+    boxes, _ = filter_detections(*arrays, classes=classes, min_area=min_area)
+    return to_frame_coords(boxes, roi).tolist()
+
+
+def detect_vehicles(model, frame, roi=None, imgsz=None, timer=None, min_area=500):
+    # Object detection, only inside roi (x1, y1, x2, y2) when one is given; min_area is in frame pixels
+    with timed(timer, 'model'):
+        arrays = predict_arrays(model, [frame if roi is None else crop(frame, roi)], imgsz)[0]
+    with timed(timer, 'postprocess'):
+        return _frame_detections(arrays, vehicle_class_ids(model.names), roi, min_area)
+
+
+def detect_vehicles_batch(model, frames, rois=None, imgsz=None, timer=None, min_area=500):
+    # One model call for the whole batch; results come back one per frame, in order
+    rois = rois or [None] * len(frames)
+    with timed(timer, 'model'):
+        batch = predict_arrays(model, [frame if roi is None else crop(frame, roi) for frame, roi in zip(frames, rois)], imgsz)
+    with timed(timer, 'postprocess'):
+        classes = vehicle_class_ids(model.names)
+        return [_frame_detections(arrays, classes, roi, min_area) for arrays, roi in zip(batch, rois)]
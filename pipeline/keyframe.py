@@ -0,0 +1,85 @@
+import cv2
+import numpy as np
+
+# Points followed per box, as fractions of its width/height: inner corners and centre
+_POINTS = np.array([[0.25, 0.25], [0.75, 0.25], [0.25, 0.75], [0.75, 0.75], [0.5, 0.5]], dtype=np.float32)
+
+
+def propagate_boxes(prev_gray, gray, boxes, win_size=(21, 21), max_level=3):
+    """Move [x, y, w, h] boxes from prev_gray to gray with sparse Lucas-Kanade flow.
+
+    Each box is shifted by the median motion of the points tracked inside it;
+    boxes whose points are all lost stay where they were.
+    """
+    if not len(boxes):
+        return boxes
+    rects = np.asarray(boxes, dtype=np.float32)
+    points = rects[:, None, :2] + _POINTS[None, :, :] * rects[:, None, 2:]
+    moved, status, _ = cv2.calcOpticalFlowPyrLK(prev_gray, gray, points.reshape(-1, 1, 2), None,
+                                                winSize=win_size, maxLevel=max_level)
+    shift = moved.reshape(points.shape) - points
+    shift[status.reshape(points.shape[:2]) == 0] = np.nan
+    with np.errstate(all='ignore'):
+        median = np.nanmedian(shift, axis=1)  # All-NaN rows stay NaN (lost box)
+    median = np.nan_to_num(median)
+    rects[:, :2] += median
+    return np.rint(rects).astype(np.int32).tolist()
+
+
+class KeyframeDetector:
+    """Runs the detector every `interval` frames and propagates boxes with optical flow in between.
+
+    Every frame still returns boxes, so the tracker and is_crossing_line see
+    the full frame rate.
+    """
+
+    def __init__(self, detect, interval=5, detect_batch=None):
+        self.detect = detect
+        self.detect_batch = detect_batch
+        self.interval = interval
+        self.prev_gray = None
+        self.boxes = []
+        self.index = 0
+        self.keyframes = 0
+
+    def due(self, count):
+        # Which of the next `count` frames go to the detector
+        return [(self.index + i) % self.interval == 0 or (i == 0 and self.prev_gray is None) for i in range(count)]
+
+    def propagating(self):
+        # Whether frames between keyframes are being skipped at the moment
+        return self.interval > 1
+
+    def step(self, frame, detections=None):
+        # Take the detections of a keyframe, or move the last boxes along to this frame
+        if not self.propagating() or (detections is None and self.prev_gray is None):
+            # Every frame detected, or nothing to propagate from yet: keep the boxes, skip the grey conversion
+            if detections is not None:
+                self.boxes = detections
+                self.keyframes += 1
+            self.prev_gray = None
+            self.index += 1
+            return self.boxes
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if detections is not None:
+            self.boxes = detections
+            self.keyframes += 1
+        else:
+            self.boxes = propagate_boxes(self.prev_gray, gray, self.boxes)
+        self.prev_gray = gray
+        self.index += 1
+        return self.boxes
+
+    def __call__(self, frame):
+        key, = self.due(1)
+        return self.step(frame, self.detect(frame) if key else None)
+
+    def batch(self, frames):
+        # Keyframes in the batch go to the detector together, the rest are propagated in order
+        keyframes = self.due(len(frames))
+        todo = [frame for frame, key in zip(frames, keyframes) if key]
+        results = iter(self.detect_batch(todo) if todo else [])
+        return [self.step(frame, next(results) if key else None) for frame, key in zip(frames, keyframes)]
+
+    def stats(self):
+        return {'keyframe_rate': round(self.keyframes / self.index, 3) if self.index else 0.0}
@@ -0,0 +1,87 @@
+import cv2
+import numpy as np
+
+from pipeline.batching import detect_selected
+from pipeline.roi import crop
+
+
+class MotionGate:
+    """Cheap check for whether anything moved inside the ROI.
+
+    Frames are cut to the ROI, shrunk to `width` pixels wide and compared
+    with the last frame that went to the detector ('diff'), or fed to a
+    small MOG2 background subtractor like yt/main.py uses ('mog2').
+    """
+
+    def __init__(self, roi=None, method='diff', width=160, threshold=25, min_changed=0.002, max_skip=30):
+        self.roi = roi
+        self.method = method
+        self.width = width
+        self.threshold = threshold  # Per-pixel grey level change that counts as motion
+        self.min_changed = min_changed  # Fraction of changed pixels that counts as a moving frame
+        self.max_skip = max_skip  # Run the detector at least this often anyway
+        self.subtractor = cv2.createBackgroundSubtractorMOG2(history=100, varThreshold=40) if method == 'mog2' else None
+        self.last = None
+        self.since_inference = 0
+        self.checked = 0
+        self.skipped = 0
+
+    def _small(self, frame):
+        region = frame if self.roi is None else crop(frame, self.roi)
+        height, width = region.shape[:2]
+        size = (self.width, max(1, int(height * self.width / width)))
+        gray = cv2.cvtColor(cv2.resize(region, size, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def moved(self, frame):
+        small = self._small(frame)
+        self.checked += 1
+        if self.subtractor is not None:
+            mask = self.subtractor.apply(small)
+            _, mask = cv2.threshold(mask, 254, 255, cv2.THRESH_BINARY)  # Drop shadow pixels
+            moved = cv2.countNonZero(mask) / mask.size >= self.min_changed
+        elif self.last is None:
+            moved = True
+        else:
+            changed = np.count_nonzero(cv2.absdiff(small, self.last) > self.threshold)
+            moved = changed / small.size >= self.min_changed
+
+        if moved or self.since_inference >= self.max_skip:
+            self.last = small
+            self.since_inference = 0
+            return True
+        self.skipped += 1
+        self.since_inference += 1
+        return False
+
+    def skip_rate(self):
+        return self.skipped / self.checked if self.checked else 0.0
+
+    def stats(self):
+        return {'skip_rate': round(self.skip_rate(), 3)}
+
+
+class GatedDetector:
+    """Wraps the detect helpers so static frames reuse the last detections.
+
+    Feeding the tracker the same boxes again keeps every ID where it was, so
+    the tracker state and crossed vehicles carry over untouched.
+    """
+
+    def __init__(self, detect, gate, detect_batch=None):
+        self.detect = detect
+        self.detect_batch = detect_batch
+        self.gate = gate
+        self.last = None
+
+    def __call__(self, frame):
+        if self.gate.moved(frame) or self.last is None:
+            self.last = self.detect(frame)
+        return self.last
+
+    def batch(self, frames):
+        # Only the frames that moved go to the detector, still as one batch
+        moved = [self.gate.moved(frame) or (i == 0 and self.last is None) for i, frame in enumerate(frames)]
+        detections = detect_selected(frames, moved, self.detect_batch, self.last)
+        self.last = detections[-1] if detections else self.last
+        return detections
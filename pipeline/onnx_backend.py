@@ -0,0 +1,92 @@
+import ast
+import logging
+import os
+
+import cv2
+import numpy as np
+import onnxruntime as ort
+
+from pipeline.detection import nms
+from pipeline.preprocess import BufferPool
+
+
+def export_onnx(weights, imgsz=640):
+    """Export YOLOv8 weights to ONNX once and cache the file next to them."""
+    if weights.endswith('.onnx'):
+        return weights  # Already exported (or quantized)
+    onnx_path = os.path.splitext(weights)[0] + '.onnx'
+    if os.path.exists(onnx_path) and (not os.path.exists(weights) or
+                                      os.path.getmtime(onnx_path) >= os.path.getmtime(weights)):
+        return onnx_path
+    from ultralytics import YOLO
+    logging.info(f"Exporting {weights} to {onnx_path}")
+    # Dynamic axes so the latency budget can still change imgsz and batch size
+    exported = YOLO(weights).export(format='onnx', imgsz=imgsz, dynamic=True)
+    if os.path.abspath(exported) != os.path.abspath(onnx_path):
+        os.replace(exported, onnx_path)
+    return onnx_path
+
+
+def letterbox(image, size, color=(114, 114, 114)):
+    # Resize keeping the aspect ratio and pad to size x size, like ultralytics does.
+    # Allocates per call; OnnxDetector uses the preallocated pipeline/preprocess.py buffers
+    height, width = image.shape[:2]
+    scale = min(size / height, size / width)
+    new_w, new_h = int(round(width * scale)), int(round(height * scale))
+    left, top = (size - new_w) // 2, (size - new_h) // 2
+    padded = np.full((size, size, 3), color, dtype=np.uint8)
+    padded[top:top + new_h, left:left + new_w] = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    return padded, scale, (left, top)
+
+
+class OnnxDetector:
+    """YOLOv8 exported to ONNX and run with onnxruntime on the CPU.
+
+    Letterboxing, confidence filtering and NMS are done here instead of in
+    ultralytics. `names` and predict_arrays match what pipeline/detection.py
+    expects from a model.
+    """
+
+    def __init__(self, path, imgsz=640, iou=0.7, max_det=300, threads=0):
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.names = ast.literal_eval(metadata['names']) if 'names' in metadata else {}
+        self.imgsz = imgsz
+        self.iou = iou
+        self.max_det = max_det
+        self.buffers = BufferPool()
+
+    def preprocess(self, images, size):
+        # Letterboxed straight into a reused input buffer; valid until the next call
+        return self.buffers.fill(images, size)
+
+    def postprocess(self, prediction, transform, conf):
+        scale, (left, top), (height, width) = transform
+        prediction = prediction.T  # (anchors, 4 + classes)
+        scores = prediction[:, 4:]
+        cls = scores.argmax(axis=1)
+        confidence = scores[np.arange(len(scores)), cls]
+        keep = confidence > conf
+        boxes, confidence, cls = prediction[keep, :4], confidence[keep], cls[keep]
+
+        # Centre/size -> corners, then undo the letterbox
+        xyxy = np.concatenate([boxes[:, :2] - boxes[:, 2:] / 2, boxes[:, :2] + boxes[:, 2:] / 2], axis=1)
+        keep = nms(xyxy, confidence, self.iou, cls)[:self.max_det]
+        xyxy = (xyxy[keep] - np.array([left, top, left, top], dtype=np.float32)) / scale
+        xyxy[:, [0, 2]] = xyxy[:, [0, 2]].clip(0, width)
+        xyxy[:, [1, 3]] = xyxy[:, [1, 3]].clip(0, height)
+        return xyxy, confidence[keep], cls[keep].astype(np.float32)
+
+    def predict_arrays(self, images, conf=0.25, imgsz=None):
+        batch, transforms = self.preprocess(images, imgsz or self.imgsz)
+        prediction = self.session.run(None, {self.input_name: batch})[0]
+        return [self.postprocess(p, t, conf) for p, t in zip(prediction, transforms)]
+
+
+def load_onnx_model(weights, imgsz=640):
+    # Drop-in for YOLO(weights) in the slaves
+    return OnnxDetector(export_onnx(weights, imgsz), imgsz)
@@ -0,0 +1,130 @@
+import logging
+import multiprocessing as mp
+import os
+import queue
+import time
+
+import cv2
+
+from pipeline.detection import detect_vehicles
+from pipeline.shm_ring import FrameRing
+
+_STOP = None  # One per worker once every frame has been handed out
+
+
+def load_detector(weights, backend, threads, imgsz=None):
+    # Each worker loads its own model, limited to its share of the cores
+    cv2.setNumThreads(1)
+    if backend == "onnx":
+        from pipeline.onnx_backend import OnnxDetector
+        return OnnxDetector(weights, imgsz or 640, threads=threads)
+    import torch
+    from ultralytics import YOLO
+    torch.set_num_threads(threads)
+    return YOLO(weights)
+
+
+def detection_worker(weights, backend, threads, ring_name, shape, slots, tasks, results, roi, imgsz):
+    # Worker process: detect on the frame in the given slot and hand the slot back with the boxes
+    model = load_detector(weights, backend, threads, imgsz)
+    ring = FrameRing(shape, slots, name=ring_name)
+    try:
+        while True:
+            task = tasks.get()
+            if task is _STOP:
+                break
+            index, slot = task
+            results.put((index, slot, detect_vehicles(model, ring.frame(slot), roi, imgsz)))
+    finally:
+        ring.close()
+
+
+class ParallelCounter:
+    """Offline counting with detection spread over worker processes.
+
+    The main process decodes into a shared-memory ring and hands slot
+    numbers to N detection workers. Results come back in any order; a
+    reorder buffer releases them to the LaneCounter strictly in frame
+    order, so tracking and line crossings see exactly what a sequential
+    run would.
+    """
+
+    def __init__(self, weights, workers, backend="torch", roi=None, imgsz=None, slots_per_worker=2, max_ahead=64):
+        self.weights = weights
+        self.workers = max(1, workers)
+        self.backend = backend
+        self.roi = roi
+        self.imgsz = imgsz
+        self.slots = self.workers * slots_per_worker
+        self.max_ahead = max(max_ahead, self.slots)  # Frames dispatched past the oldest unfinished one
+        self.threads = max(1, (os.cpu_count() or 1) // self.workers)
+        self.frames = 0
+        self.max_reorder = 0  # Deepest the reorder buffer got
+
+    def run(self, video_path, counter, max_frames=None):
+        if self.backend == "onnx":
+            from pipeline.onnx_backend import export_onnx
+            self.weights = export_onnx(self.weights, self.imgsz or 640)  # Once here, not in every worker
+
+        cap = cv2.VideoCapture(video_path)
+        shape = (int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)), int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), 3)
+        ring = FrameRing(shape, self.slots)
+        tasks, results = mp.Queue(), mp.Queue()
+        processes = [mp.Process(target=detection_worker, daemon=True,
+                                args=(self.weights, self.backend, self.threads, ring.name, shape, self.slots,
+                                      tasks, results, self.roi, self.imgsz))
+                     for _ in range(self.workers)]
+        for process in processes:
+            process.start()
+
+        free = list(range(self.slots))
+        reorder = {}
+        dispatched = next_index = 0
+        ended = False
+        started = time.perf_counter()
+        try:
+            while True:
+                # Keep every free slot busy, without running too far ahead of the counter
+                while free and not ended and dispatched - next_index < self.max_ahead:
+                    if max_frames is not None and dispatched >= max_frames:
+                        ended = True
+                        break
+                    slot = free.pop()
+                    ret, frame = cap.read(ring.frame(slot))
+                    if not ret or frame.shape != shape:
+                        free.append(slot)
+                        ended = True
+                        break
+                    tasks.put((dispatched, slot))
+                    dispatched += 1
+                if next_index == dispatched and ended:
+                    break
+
+                try:
+                    index, slot, detections = results.get(timeout=1.0)
+                except queue.Empty:
+                    if not any(process.is_alive() for process in processes):
+                        raise RuntimeError("All detection workers exited")
+                    continue
+                free.append(slot)
+                reorder[index] = detections
+                self.max_reorder = max(self.max_reorder, len(reorder))
+                while next_index in reorder:
+                    counter.update(reorder.pop(next_index))
+                    next_index += 1
+                    self.frames += 1
+        finally:
+            for _ in processes:
+                tasks.put(_STOP)
+            for process in processes:
+                process.join(timeout=5.0)
+                if process.is_alive():
+                    process.terminate()
+            cap.release()
+            ring.close()
+
+        elapsed = time.perf_counter() - started
+        logging.info(f"Parallel count: {counter.vehicle_count} vehicles, {self.frames} frames in {elapsed:.1f}s "
+                     f"({self.frames / elapsed if elapsed else 0:.1f} FPS) with {self.workers} workers, "
+                     f"max reorder depth {self.max_reorder}")
+        return counter.vehicle_count
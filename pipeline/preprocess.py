@@ -0,0 +1,63 @@
+import cv2
+import numpy as np
+
+_SCALE = np.float32(1 / 255.0)
+
+
+class LetterboxBuffer:
+    """Reusable letterbox canvas and NCHW float32 input for one size and up to `batch` frames.
+
+    Frames are resized straight into the canvas and converted into the input
+    array in place, so steady-state preprocessing allocates nothing per frame.
+    The returned input is a view that is overwritten by the next fill().
+    """
+
+    def __init__(self, size, batch=1, color=114):
+        self.size = size
+        self.color = color
+        self.canvas = np.full((batch, size, size, 3), color, dtype=np.uint8)
+        self.input = np.empty((batch, 3, size, size), dtype=np.float32)
+        self.layouts = [None] * batch  # Frame shape each slot was last padded for
+
+    def _layout(self, shape):
+        height, width = shape[:2]
+        scale = min(self.size / height, self.size / width)
+        new_w, new_h = int(round(width * scale)), int(round(height * scale))
+        return scale, (self.size - new_w) // 2, (self.size - new_h) // 2, new_w, new_h
+
+    def fill(self, images):
+        transforms = []
+        for i, image in enumerate(images):
+            scale, left, top, new_w, new_h = self._layout(image.shape)
+            if self.layouts[i] != image.shape[:2]:
+                # Padding only needs repainting when the frame size changes
+                self.canvas[i].fill(self.color)
+                self.layouts[i] = image.shape[:2]
+            cv2.resize(image, (new_w, new_h), dst=self.canvas[i, top:top + new_h, left:left + new_w],
+                       interpolation=cv2.INTER_LINEAR)
+            # BGR HWC uint8 -> RGB CHW float 0..1, channel by channel into the input buffer
+            for channel in range(3):
+                np.multiply(self.canvas[i, :, :, 2 - channel], _SCALE, out=self.input[i, channel], dtype=np.float32)
+            transforms.append((scale, (left, top), image.shape[:2]))
+        return self.input[:len(images)], transforms
+
+
+class BufferPool:
+    """One LetterboxBuffer per size, grown to the largest batch seen.
+
+    Smaller batches use the front slots; fill() already returns only
+    input[:len(images)]. Keying by batch size as well would keep a buffer
+    for every size the cascade's varying crop counts ever produced.
+    """
+
+    def __init__(self):
+        self.buffers = {}
+
+    def get(self, size, batch):
+        buffer = self.buffers.get(size)
+        if buffer is None or len(buffer.layouts) < batch:
+            buffer = self.buffers[size] = LetterboxBuffer(size, batch)
+        return buffer
+
+    def fill(self, images, size):
+        return self.get(size, len(images)).fill(images)
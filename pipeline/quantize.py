@@ -0,0 +1,42 @@
+import logging
+
+from onnxruntime.quantization import (CalibrationDataReader, QuantFormat, QuantType, quantize_dynamic,
+                                      quantize_static)
+
+
+class FrameCalibrationReader(CalibrationDataReader):
+    """Feeds recorded frames, preprocessed exactly like OnnxDetector does, to the calibrator."""
+
+    def __init__(self, detector, frames, imgsz):
+        self.input_name = detector.input_name
+        # Copies, since preprocess() reuses one buffer
+        self.batches = iter([detector.preprocess([frame], imgsz)[0].copy() for frame in frames])
+
+    def get_next(self):
+        batch = next(self.batches, None)
+        return None if batch is None else {self.input_name: batch}
+
+
+def quantize_detector(fp32_path, int8_path, method='static', detector=None, frames=None, imgsz=640):
+    """Write an INT8 copy of an exported YOLOv8 ONNX model.
+
+    'static' calibrates activation ranges on `frames` (our own recordings);
+    'dynamic' quantizes weights only and needs no calibration data.
+    """
+    if method == 'static':
+        logging.info(f"Calibrating {fp32_path} on {len(frames)} frames")
+        quantize_static(fp32_path, int8_path, FrameCalibrationReader(detector, frames, imgsz),
+                        quant_format=QuantFormat.QDQ, per_channel=True,
+                        activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8)
+    else:
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QUInt8)
+    return int8_path
+
+
+def accuracy_regression(fp32_scores, int8_scores, max_drop):
+    # Reasons to reject the INT8 model; empty when precision and recall both hold up
+    reasons = []
+    for name, fp32, int8 in zip(('precision', 'recall'), fp32_scores, int8_scores):
+        if fp32 - int8 > max_drop:
+            reasons.append(f"{name} {int8:.3f} vs {fp32:.3f} FP32 (drop {fp32 - int8:.3f} > {max_drop})")
+    return reasons
@@ -0,0 +1,132 @@
+import collections
+import multiprocessing as mp
+import os
+import queue
+import time
+
+import cv2
+import numpy as np
+
+from pipeline.shm_ring import FrameRing
+
+_END = None  # Closes the current segment and stops the encoder
+
+
+def encode_segments(ready, free, directory, prefix, max_segments, codec):
+    # Encoder process: wait for the ring to exist, then write each ready slot to the current segment
+    setup = ready.get()
+    if setup is _END:
+        return
+    ring_name, shape, slots, fps, segment_frames = setup
+    ring = FrameRing(shape, slots, name=ring_name)
+    height, width = shape[:2]
+    writer = None
+    written = 0
+    segments = collections.deque()
+    try:
+        while True:
+            slot = ready.get()
+            if slot is _END:
+                break
+            if writer is None or written >= segment_frames:
+                if writer is not None:
+                    writer.release()
+                path = os.path.join(directory, f"{prefix}_{time.strftime('%Y%m%d-%H%M%S')}_{len(segments):04d}.mp4")
+                writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*codec), fps, (width, height))
+                segments.append(path)
+                written = 0
+                # Rolling layout: only the newest max_segments files are kept
+                while max_segments and len(segments) > max_segments:
+                    old = segments.popleft()
+                    if os.path.exists(old):
+                        os.remove(old)
+            writer.write(ring.frame(slot))
+            written += 1
+            free.put(slot)
+    finally:
+        if writer is not None:
+            writer.release()
+        ring.close()
+
+
+class AsyncRecorder:
+    """Annotated-frame recorder that never holds up the slave loop.
+
+    write() copies the frame into a shared-memory slot and returns at once;
+    a separate process encodes rolling segments of segment_seconds each.
+    The free slots are the bounded queue. When the encoder falls behind,
+    'drop' discards frames that find no free slot, and 'decimate' starts
+    keeping only every `decimate`-th frame once half the slots are
+    backlogged, dropping only if that is not enough.
+    """
+
+    def __init__(self, directory, fps=25.0, segment_seconds=60, max_segments=10, slots=8, policy='drop',
+                 decimate=2, prefix='clip', codec='mp4v'):
+        os.makedirs(directory, exist_ok=True)
+        self.fps = fps  # May be set later, until the first frame is written
+        self.segment_seconds = segment_seconds
+        self.slots = slots
+        self.policy = policy
+        self.decimate = max(2, decimate)
+        self.ring = None  # Created on the first frame, once its size is known
+        self.free = []
+        self.offered = 0
+        self.recorded = 0
+        self.dropped = 0
+        self.decimated = 0
+        # The encoder is forked right away (not spawned, which would re-import
+        # the slave script and torch with it), so create the recorder before the
+        # slave starts threads or loads models: a fork copies whatever locks
+        # those hold. It gets the ring's name and frame size with the first frame
+        ctx = mp.get_context('fork')
+        self.ready, self.returned = ctx.Queue(), ctx.Queue()
+        self.process = ctx.Process(target=encode_segments, daemon=True,
+                                  args=(self.ready, self.returned, directory, prefix, max_segments, codec))
+        self.process.start()
+
+    def _start(self, shape):
+        self.ring = FrameRing(shape, self.slots)
+        self.free = list(range(self.slots))
+        segment_frames = max(1, int(self.segment_seconds * self.fps))
+        self.ready.put((self.ring.name, shape, self.slots, self.fps, segment_frames))
+
+    def _collect(self):
+        while True:
+            try:
+                self.free.append(self.returned.get_nowait())
+            except queue.Empty:
+                return
+
+    def backlog(self):
+        return self.slots - len(self.free) if self.ring is not None else 0
+
+    def write(self, frame):
+        if self.ring is None:
+            self._start(frame.shape)
+        elif frame.shape != self.ring.shape:
+            self.dropped += 1  # Segments have a fixed size
+            return False
+        self.offered += 1
+        self._collect()
+        if self.policy == 'decimate' and self.backlog() >= self.slots // 2 and self.offered % self.decimate:
+            self.decimated += 1
+            return False
+        if not self.free:
+            self.dropped += 1
+            return False
+        slot = self.free.pop()
+        np.copyto(self.ring.frame(slot), frame)
+        self.ready.put(slot)
+        self.recorded += 1
+        return True
+
+    def stats(self):
+        return {'rec_dropped': self.dropped, 'rec_decimated': self.decimated, 'rec_backlog': self.backlog()}
+
+    def close(self):
+        self.ready.put(_END)
+        self.process.join(timeout=10.0)  # Let the last segment finish
+        if self.process.is_alive():
+            self.process.terminate()
+        if self.ring is not None:
+            self.ring.close()
@@ -0,0 +1,115 @@
+import queue
+import threading
+import time
+
+import cv2
+
+
+def draw_overlay(frame, boxes_ids, line_start, line_end, roi=None, scale=1.0):
+    # With scale < 1 the overlay goes on a shrunken copy and the full frame is left alone
+    if scale != 1.0:
+        frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        boxes_ids = [[int(x * scale), int(y * scale), int(w * scale), int(h * scale), id] for x, y, w, h, id in boxes_ids]
+        roi = None if roi is None else tuple(int(v * scale) for v in roi)
+        if line_start and line_end:
+            line_start = (int(line_start[0] * scale), int(line_start[1] * scale))
+            line_end = (int(line_end[0] * scale), int(line_end[1] * scale))
+    thickness = max(1, int(round(3 * scale)))
+
+    # Outline the region the detector actually sees
+    if roi is not None:
+        cv2.rectangle(frame, roi[:2], roi[2:], (255, 255, 0), 1)
+
+    # Draw the tracked boxes with their IDs
+    for x, y, w, h, id in boxes_ids:
+        cv2.putText(frame, str(id), (x, y - int(15 * scale)), cv2.FONT_HERSHEY_PLAIN, 2 * scale, (255, 0, 0),
+                    max(1, int(round(2 * scale))))
+        cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), thickness)
+
+    # Draw the counting line on the full frame
+    if line_start and line_end:
+        cv2.line(frame, line_start, line_end, (0, 0, 255), thickness)
+    return frame
+
+
+class RenderPolicy:
+    """Which tracked frames get an overlay at all, and at what scale.
+
+    every: only every n-th frame. on_demand: nothing until request() is
+    called (e.g. from a SIGUSR1 handler), then every n-th frame for
+    demand_seconds. scale: draw on a copy shrunk by this factor.
+    """
+
+    def __init__(self, every=1, scale=1.0, on_demand=False, demand_seconds=10.0):
+        self.every = max(1, every)
+        self.scale = scale
+        self.on_demand = on_demand
+        self.demand_seconds = demand_seconds
+        self.until = 0.0
+
+    def request(self, seconds=None):
+        self.until = time.monotonic() + (seconds or self.demand_seconds)
+
+    def wants(self, index):
+        if self.on_demand and time.monotonic() > self.until:
+            return False
+        return index % self.every == 0
+
+
+class RenderStage:
+    """Overlay drawing in its own thread so the counting loop never pays for it.
+
+    submit() hands over frames the policy wants through a small queue and
+    drops them when drawing falls behind. show() displays the newest
+    finished overlay from the calling thread, since imshow has to run there.
+    With copy set (sources whose frame buffers get reused, like the shared-
+    memory ring), frames are copied on submit, since they may be drawn and
+    shown long after the source has handed their buffer out again.
+    """
+
+    def __init__(self, draw, policy, queue_size=2, copy=False):
+        self.draw = draw  # (index, frame, boxes_ids) -> annotated frame
+        self.policy = policy
+        self.copy = copy
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.latest = None
+        self.shown = None
+        self.rendered = 0
+        self.dropped = 0
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(self, index, frame, boxes_ids):
+        if not self.policy.wants(index):
+            return
+        if self.copy:
+            frame = frame.copy()
+        try:
+            self.queue.put_nowait((index, frame, boxes_ids))
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            self.latest = self.draw(*item)
+            self.rendered += 1
+
+    def show(self, window):
+        latest = self.latest
+        if latest is not None and latest is not self.shown:
+            cv2.imshow(window, latest)
+            self.shown = latest
+        return cv2.waitKey(1) != 27  # Press ESC to exit
+
+    def stats(self):
+        return {'rendered': self.rendered, 'render_dropped': self.dropped}
+
+    def close(self):
+        try:
+            self.queue.put(None, timeout=1.0)
+        except queue.Full:
+            pass
+        self.thread.join(timeout=1.0)
@@ -0,0 +1,41 @@
+import cv2
+import numpy as np
+
+
+def line_roi(line_start, line_end, frame_shape, pad=150):
+    # Padded rectangle around the counting line, clipped to the frame
+    height, width = frame_shape[:2]
+    x1 = max(0, min(line_start[0], line_end[0]) - pad)
+    y1 = max(0, min(line_start[1], line_end[1]) - pad)
+    x2 = min(width, max(line_start[0], line_end[0]) + pad)
+    y2 = min(height, max(line_start[1], line_end[1]) + pad)
+    return x1, y1, x2, y2
+
+
+def mask_roi(mask, pad=0):
+    # Bounding rectangle of the non-black part of a mask image
+    gray = cv2.cvtColor(mask, cv2.COLOR_BGR2GRAY) if mask.ndim == 3 else mask
+    points = cv2.findNonZero(gray)
+    height, width = gray.shape[:2]
+    if points is None:
+        return 0, 0, width, height
+    x, y, w, h = cv2.boundingRect(points)
+    return max(0, x - pad), max(0, y - pad), min(width, x + w + pad), min(height, y + h + pad)
+
+
+def crop(frame, roi):
+    # A view, not a copy
+    x1, y1, x2, y2 = roi
+    return frame[y1:y2, x1:x2]
+
+
+def roi_fraction(roi, frame_shape):
+    x1, y1, x2, y2 = roi
+    return (x2 - x1) * (y2 - y1) / float(frame_shape[0] * frame_shape[1])
+
+
+def to_frame_coords(boxes, roi):
+    # Shift [x, y, w, h] boxes found in the crop back into the full frame
+    if roi is None or not len(boxes):
+        return boxes
+    return boxes + np.array([roi[0], roi[1], 0, 0], dtype=boxes.dtype)
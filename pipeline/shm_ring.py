@@ -0,0 +1,140 @@
+import collections
+import multiprocessing as mp
+import queue
+import time
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+_END = None  # Sent on the ready queue once the video runs out
+
+
+class FrameRing:
+    """Fixed-size BGR frame slots in one multiprocessing.shared_memory block.
+
+    Only slot numbers travel between processes (through small queues); the
+    pixels are written and read in place, so a 1080p frame is never pickled.
+    """
+
+    def __init__(self, shape, slots, name=None):
+        self.shape = tuple(shape)
+        self.slots = slots
+        size = int(np.prod(self.shape)) * slots
+        self.owner = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=size if self.owner else 0)
+        self.frames = np.ndarray((slots,) + self.shape, dtype=np.uint8, buffer=self.shm.buf)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def frame(self, slot):
+        return self.frames[slot]
+
+    def close(self):
+        self.frames = None
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # Frames are still referenced somewhere; the mapping goes with the process
+        if self.owner:
+            self.shm.unlink()
+
+
+def decode_to_ring(path, ring_name, shape, slots, free, ready, stop_event):
+    # Decoder process: read() straight into a free slot and pass its number on
+    ring = FrameRing(shape, slots, name=ring_name)
+    cap = cv2.VideoCapture(path)
+    try:
+        while not stop_event.is_set():
+            try:
+                slot = free.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            started = time.perf_counter()
+            ret, frame = cap.read(ring.frame(slot))
+            if not ret:
+                break
+            if frame.shape != ring.shape:
+                break  # Resolution changed mid-file, the slots no longer fit
+            ready.put((slot, time.perf_counter() - started))
+    finally:
+        ready.put(_END)
+        cap.release()
+        ring.close()
+
+
+class SharedMemorySource:
+    """cv2.VideoCapture stand-in whose frames are decoded in another process.
+
+    read() returns a view into the shared ring. A slot goes back to the
+    decoder only after `hold` newer frames have been read, so frames still
+    sitting in pipeline queues or batches must fit within `hold`. Stages
+    that drop frames instead of blocking (rendering) apply no backpressure,
+    so they copy frames from sources with reuses_buffers set.
+    """
+
+    reuses_buffers = True
+
+    def __init__(self, path, slots=8, hold=1, window=100):
+        probe = cv2.VideoCapture(path)
+        self.props = {prop: probe.get(prop) for prop in (cv2.CAP_PROP_FRAME_WIDTH, cv2.CAP_PROP_FRAME_HEIGHT,
+                                                          cv2.CAP_PROP_FPS, cv2.CAP_PROP_FRAME_COUNT)}
+        probe.release()
+        shape = (int(self.props[cv2.CAP_PROP_FRAME_HEIGHT]), int(self.props[cv2.CAP_PROP_FRAME_WIDTH]), 3)
+        self.hold = max(1, hold)
+        slots = max(slots, self.hold + 2)  # Leave the decoder room to work ahead
+        self.ring = FrameRing(shape, slots)
+        self.free = mp.Queue()
+        self.ready = mp.Queue()
+        for slot in range(slots):
+            self.free.put(slot)
+        self.held = collections.deque()
+        self.decode_times = collections.deque(maxlen=window)
+        self.ended = False
+        self.stop_event = mp.Event()
+        self.process = mp.Process(target=decode_to_ring, daemon=True,
+                                  args=(path, self.ring.name, shape, slots, self.free, self.ready, self.stop_event))
+        self.process.start()
+
+    def read(self):
+        if self.ended:
+            return False, None
+        while True:
+            try:
+                item = self.ready.get(timeout=0.1)
+                break
+            except queue.Empty:
+                if not self.process.is_alive():
+                    item = _END
+                    break
+        if item is _END:
+            self.ended = True
+            return False, None
+        slot, decode_time = item
+        self.decode_times.append(decode_time)
+        self.held.append(slot)
+        if len(self.held) > self.hold:
+            self.free.put(self.held.popleft())
+        return True, self.ring.frame(slot)
+
+    def isOpened(self):
+        return self.process.is_alive() or not self.ended
+
+    def get(self, prop):
+        return self.props.get(prop, 0.0)
+
+    def decode_fps(self):
+        busy = sum(self.decode_times)
+        return len(self.decode_times) / busy if busy else 0.0
+
+    def stats(self):
+        return {'decode_fps': round(self.decode_fps(), 1), 'ring_ready': self.ready.qsize()}
+
+    def release(self):
+        self.stop_event.set()
+        self.process.join(timeout=2.0)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.ring.close()
@@ -0,0 +1,197 @@
+import logging
+import queue
+import threading
+import time
+
+from pipeline.batching import BatchStats
+from pipeline.timing import timed
+
+_END = object()  # Passed down every queue once the video runs out
+
+
+class SlavePipeline:
+    """Capture, inference, tracking/counting and rendering as separate threads.
+
+    The stages are joined by bounded queues so decoding and GUI work overlap
+    with inference instead of adding to it. Rendering runs in the calling
+    thread (imshow has to) and is dropped rather than allowed to stall counting.
+
+    With batch_size > 1 the inference stage takes up to batch_size frames, or
+    whatever arrived within batch_timeout seconds, and runs them through
+    detect_batch in one call; results still reach the tracker in frame order.
+    """
+
+    def __init__(self, cap, detect, counter, render=None, queue_size=4, report_interval=5.0, name="slave",
+                 detect_batch=None, batch_size=1, batch_timeout=0.05, on_frame=None, render_policy=None,
+                 timer=None):
+        self.cap = cap
+        self.detect = detect  # frame -> list of [x, y, w, h]
+        self.detect_batch = detect_batch  # list of frames -> list of detection lists
+        self.batch_size = batch_size if detect_batch is not None else 1
+        self.batch_timeout = batch_timeout
+        self.on_frame = on_frame  # (index, seconds since capture) once a frame has been counted
+        self.counter = counter  # LaneCounter
+        self.render = render  # (index, frame, boxes_ids) -> False to stop
+        self.render_policy = render_policy  # RenderPolicy; None renders every frame
+        # Shared-memory slots get recycled while a frame waits in the dropping render queue
+        self.copy_rendered = getattr(cap, 'reuses_buffers', False)
+        self.timer = timer  # StageTimer; each thread tags its stages with the frame it is on
+        self.report_interval = report_interval
+        self.name = name
+        self.queues = {
+            'capture': queue.Queue(maxsize=queue_size),  # decoded frames waiting for the detector
+            'infer': queue.Queue(maxsize=queue_size),  # detections waiting for the tracker
+            'render': queue.Queue(maxsize=2),  # tracked frames waiting for imshow
+        }
+        self.stop_event = threading.Event()
+        self.frames_done = 0
+        self.render_dropped = 0
+        self.detector_wait = 0.0  # Seconds the detector spent waiting on decode
+        self.detector_busy = 0.0
+        self.batch_stats = BatchStats()
+
+    def _put(self, name, item):
+        q = self.queues[name]
+        while not self.stop_event.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, name):
+        q = self.queues[name]
+        while not self.stop_event.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _END
+
+    def _capture(self):
+        index = 0
+        while not self.stop_event.is_set():
+            if self.timer:
+                self.timer.begin(index)
+            with timed(self.timer, 'read'):
+                ret, frame = self.cap.read()
+            if not ret:
+                break
+            # Live sources stamp frames when the camera delivered them, not when we read them
+            captured = getattr(self.cap, 'frame_time', None) or time.perf_counter()
+            if not self._put('capture', (index, frame, captured)):
+                return
+            index += 1
+        self._put('capture', _END)
+
+    def _next_batch(self):
+        # Block for the first frame, then take more until the batch is full or the timeout runs out
+        item = self._get('capture')
+        if item is _END:
+            return [], True
+        batch = [(item, time.perf_counter())]
+        deadline = time.perf_counter() + self.batch_timeout
+        q = self.queues['capture']
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = q.get(timeout=remaining) if remaining > 0 else q.get_nowait()
+            except queue.Empty:
+                break
+            if item is _END:
+                return batch, True
+            batch.append((item, time.perf_counter()))
+        return batch, False
+
+    def _infer(self):
+        ended = False
+        while not ended:
+            waited = time.perf_counter()
+            batch, ended = self._next_batch()
+            if not batch:
+                break
+            started = time.perf_counter()
+            # Waiting for the rest of the batch counts as detector idle time too
+            self.detector_wait += started - waited
+            frames = [frame for (index, frame, captured), _ in batch]
+            if self.timer:
+                self.timer.begin(batch[0][0][0])  # A batch is traced under its first frame
+            with timed(self.timer, 'detect'):
+                if self.batch_size > 1:
+                    results = self.detect_batch(frames)
+                else:
+                    results = [self.detect(frames[0])]
+            done = time.perf_counter()
+            self.detector_busy += done - started
+            self.batch_stats.add(len(batch), done - started, [done - taken for _, taken in batch])
+            for ((index, frame, captured), _), detections in zip(batch, results):
+                if not self._put('infer', (index, frame, captured, detections)):
+                    return
+        self._put('infer', _END)
+
+    def _track(self):
+        while True:
+            item = self._get('infer')
+            if item is _END:
+                break
+            index, frame, captured, detections = item
+            if self.timer:
+                self.timer.begin(index)
+            boxes_ids = self.counter.update(detections)
+            self.frames_done += 1
+            if self.on_frame is not None:
+                self.on_frame(index, time.perf_counter() - captured)
+            if self.render is not None and (self.render_policy is None or self.render_policy.wants(index)):
+                if self.copy_rendered:
+                    frame = frame.copy()
+                try:
+                    self.queues['render'].put_nowait((index, frame, boxes_ids))
+                except queue.Full:
+                    self.render_dropped += 1  # Never hold up counting for the GUI
+        if self.render is not None:
+            self._put('render', _END)
+
+    def queue_fill(self):
+        return {name: (q.qsize(), q.maxsize) for name, q in self.queues.items()}
+
+    def detector_idle(self):
+        total = self.detector_wait + self.detector_busy
+        return 100 * self.detector_wait / total if total else 0.0
+
+    def _report(self):
+        while not self.stop_event.wait(self.report_interval):
+            fill = ", ".join(f"{name} {size}/{maxsize}" for name, (size, maxsize) in self.queue_fill().items())
+            logging.info(f"Pipeline ({self.name}): count {self.counter.vehicle_count}, frames {self.frames_done}, "
+                         f"queues {fill}, detector idle {self.detector_idle():.1f}%, "
+                         f"render dropped {self.render_dropped}, {self.batch_stats.describe()}")
+
+    def run(self):
+        workers = [threading.Thread(target=target, daemon=True) for target in (self._capture, self._infer, self._track)]
+        reporter = threading.Thread(target=self._report, daemon=True)
+        for worker in workers:
+            worker.start()
+        reporter.start()
+        try:
+            if self.render is not None:
+                while True:
+                    item = self._get('render')
+                    if item is _END:
+                        break
+                    if self.timer:
+                        self.timer.begin(item[0])
+                    with timed(self.timer, 'render'):
+                        keep_going = self.render(*item)
+                    if not keep_going:
+                        break
+            else:
+                workers[-1].join()
+        finally:
+            self.stop_event.set()
+            for worker in workers:
+                worker.join()
+        logging.info(f"Pipeline ({self.name}) finished: count {self.counter.vehicle_count}, "
+                     f"frames {self.frames_done}, detector idle {self.detector_idle():.1f}%, "
+                     f"{self.batch_stats.describe()}")
+        if self.timer:
+            logging.info(f"Stage ms p50/p95/p99 ({self.name}): {self.timer.describe()}")
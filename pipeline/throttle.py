@@ -0,0 +1,56 @@
+import logging
+import time
+
+from pipeline.keyframe import KeyframeDetector
+
+
+class ThrottledDetector(KeyframeDetector):
+    """Runs the detector at the sampling rate it was asked for.
+
+    Rates come from the master and from the host's budget coordinator. They
+    are kept by wall clock: a frame goes to the detector once 1/rate seconds
+    have passed since the last one that did, so a file read as fast as the
+    slave can go is cut to the same detector load as a live camera. Frames
+    in between have the last boxes moved along with optical flow, as in
+    KeyframeDetector, so vehicles keep their tracker IDs and still cross the
+    line band. A rate of 0 (or None) means every frame; with several
+    sources asking, the lowest rate wins.
+    """
+
+    def __init__(self, detect, detect_batch=None, name="slave"):
+        super().__init__(detect, 1, detect_batch)
+        self.name = name
+        self.rates = {}  # Requested FPS by who asked for it
+        self.sample_fps = None
+        self.period = 0.0  # Seconds between detections, 0 = every frame
+        self.sampled_at = 0.0  # perf_counter of the last frame sent to the detector
+        self.called_at = None
+
+    def set_rate(self, sample_fps, source='master'):
+        self.rates[source] = sample_fps
+        sample_fps = min((rate for rate in self.rates.values() if rate), default=None)
+        if sample_fps != self.sample_fps:
+            logging.info(f"Sampling ({self.name}): {sample_fps or 'full'} FPS requested by {source}")
+        self.sample_fps = sample_fps
+        self.period = 1.0 / sample_fps if sample_fps else 0.0
+
+    def due(self, count):
+        # Frames of a batch arrived over the time since the last call; spread them across it
+        now = time.perf_counter()
+        since = self.called_at if self.called_at is not None else now
+        self.called_at = now
+        keys = []
+        for i in range(count):
+            at = since + (now - since) * (i + 1) / count
+            key = not self.period or (i == 0 and self.prev_gray is None) or at - self.sampled_at >= self.period
+            if key:
+                self.sampled_at = at
+            keys.append(key)
+        return keys
+
+    def propagating(self):
+        return bool(self.period)
+
+    def stats(self):
+        return {'sample_fps': self.sample_fps or 'full',
+                'sampled': round(self.keyframes / self.index, 3) if self.index else 0.0}
@@ -0,0 +1,63 @@
+import numpy as np
+
+from pipeline.detection import box_ios, nms, predict_arrays
+
+
+def tile_grid(width, height, tile, overlap):
+    # Top-left corners of overlapping tile x tile windows covering the image
+    step = max(1, int(tile * (1 - overlap)))
+
+    def starts(length):
+        if length <= tile:
+            return [0]
+        points = list(range(0, length - tile + 1, step))
+        if points[-1] + tile < length:
+            points.append(length - tile)  # Last tile flush with the edge
+        return points
+
+    return [(x, y, min(x + tile, width), min(y + tile, height)) for y in starts(height) for x in starts(width)]
+
+
+class TiledDetector:
+    """Sliced inference for dense high-resolution frames.
+
+    Each frame is cut into overlapping tile x tile windows that go through
+    the model as one batch at their native resolution, so small two-wheelers
+    are not lost to downscaling. A downscaled full-frame pass (`full_frame`)
+    catches vehicles bigger than a tile. Tile results are merged with
+    intersection-over-smaller NMS, which also removes halves of vehicles cut
+    by a tile edge.
+    """
+
+    def __init__(self, model, tile=640, overlap=0.2, full_frame=True, merge_ios=0.6):
+        self.model = model
+        self.names = model.names
+        self.tile = tile
+        self.overlap = overlap
+        self.full_frame = full_frame
+        self.merge_ios = merge_ios
+
+    def predict_arrays(self, images, conf=0.5, imgsz=None):
+        crops, plans = [], []
+        for image in images:
+            height, width = image.shape[:2]
+            windows = tile_grid(width, height, self.tile, self.overlap)
+            plans.append(windows)
+            crops += [image[y1:y2, x1:x2] for x1, y1, x2, y2 in windows]
+        # Tiles are already model-sized, so they are not rescaled
+        tiled = iter(predict_arrays(self.model, crops, self.tile, conf))
+        full = iter(predict_arrays(self.model, images, imgsz, conf) if self.full_frame else [])
+
+        outputs = []
+        for windows in plans:
+            parts = [next(full)] if self.full_frame else []
+            for x1, y1, _, _ in windows:
+                xyxy, scores, cls = next(tiled)
+                parts.append((xyxy + np.array([x1, y1, x1, y1], dtype=np.float32), scores, cls))
+            merged = [np.concatenate(column) for column in zip(*parts)]
+            chosen = nms(merged[0], merged[1], self.merge_ios, merged[2], metric=box_ios)
+            outputs.append(tuple(column[chosen] for column in merged))
+        return outputs
+
+    def tiles_per_frame(self, shape):
+        return len(tile_grid(shape[1], shape[0], self.tile, self.overlap))
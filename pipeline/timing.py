@@ -0,0 +1,66 @@
+import collections
+import contextlib
+import threading
+import time
+
+from pipeline.batching import percentile
+
+
+class StageTimer:
+    """Rolling per-stage durations for one slave, plus an optional trace file.
+
+    Stages are timed with `with timer.stage('model'):` from whichever thread
+    runs them. begin(index) tells the timer which frame the calling thread
+    is working on, so trace lines can be tied back to frames. The trace is
+    CSV: wall time, frame index, stage, milliseconds.
+    """
+
+    def __init__(self, window=500, trace_path=None):
+        self.samples = collections.defaultdict(lambda: collections.deque(maxlen=window))  # Seconds per stage
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.trace = None
+        if trace_path:
+            self.trace = open(trace_path, 'w', buffering=1 << 16)
+            self.trace.write("time,frame,stage,ms\n")
+
+    def begin(self, index):
+        self.local.index = index
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def add(self, name, seconds):
+        with self.lock:
+            self.samples[name].append(seconds)
+            if self.trace is not None:
+                self.trace.write(f"{time.time():.3f},{getattr(self.local, 'index', -1)},{name},{seconds * 1000:.3f}\n")
+
+    def summary(self):
+        # {stage: (p50, p95, p99)} in milliseconds, in the order stages were first seen
+        with self.lock:
+            samples = {name: list(values) for name, values in self.samples.items()}
+        return {name: tuple(round(percentile(values, pct) * 1000, 2) for pct in (50, 95, 99))
+                for name, values in samples.items()}
+
+    def describe(self):
+        return ", ".join(f"{name} {p50}/{p95}/{p99}" for name, (p50, p95, p99) in self.summary().items())
+
+    def stats(self):
+        return {'stage_ms_p50_p95_p99': self.summary()}
+
+    def close(self):
+        with self.lock:
+            if self.trace is not None:
+                self.trace.close()
+                self.trace = None
+
+
+def timed(timer, name):
+    # timer.stage(name), or nothing when timing is off
+    return timer.stage(name) if timer is not None else contextlib.nullcontext()
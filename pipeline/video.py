@@ -0,0 +1,215 @@
+import collections
+import os
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from pipeline.batching import percentile
+
+_END = None  # Queued once the file runs out
+
+
+class ThreadedVideoSource:
+    """cv2.VideoCapture stand-in that decodes in a background thread.
+
+    Only every `skip`-th frame is retrieve()d; the ones in between are just
+    grab()bed, which still decodes the packet (later frames depend on it) but
+    skips the colour conversion and copy out of the decoder. With `width`
+    set, kept frames are shrunk in the decode thread as well, and get()
+    reports the reduced size so ROIs and lines can be scaled to match.
+    """
+
+    def __init__(self, path, skip=1, width=None, queue_size=8):
+        self.cap = cv2.VideoCapture(path)
+        self.skip = max(1, skip)
+        source_width = self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)
+        self.scale = width / source_width if width and source_width and width < source_width else 1.0
+        self.frames = queue.Queue(maxsize=queue_size)
+        self.stop_event = threading.Event()
+        self.grabbed = 0  # Frames read from the file, kept or not
+        self.retrieved = 0
+        self.busy = 0.0  # Seconds spent decoding, not waiting for the consumer
+        self.thread = threading.Thread(target=self._decode, daemon=True)
+        self.thread.start()
+
+    def _decode(self):
+        index = 0
+        while not self.stop_event.is_set():
+            started = time.perf_counter()
+            if not self.cap.grab():
+                break
+            self.grabbed += 1
+            keep = index % self.skip == 0
+            index += 1
+            if not keep:
+                self.busy += time.perf_counter() - started
+                continue
+            ret, frame = self.cap.retrieve()
+            if not ret:
+                break
+            if self.scale != 1.0:
+                frame = cv2.resize(frame, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+            self.retrieved += 1
+            self.busy += time.perf_counter() - started
+            while not self.stop_event.is_set():
+                try:
+                    self.frames.put(frame, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+        self._finish()
+
+    def _finish(self):
+        while not self.stop_event.is_set():
+            try:
+                self.frames.put(_END, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def read(self):
+        while True:
+            try:
+                frame = self.frames.get(timeout=0.1)
+                break
+            except queue.Empty:
+                if self.stop_event.is_set() or not self.thread.is_alive():
+                    return False, None
+        if frame is _END:
+            self.frames.put(_END)  # Keep answering False to later reads
+            return False, None
+        return True, frame
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def get(self, prop):
+        value = self.cap.get(prop)
+        if prop in (cv2.CAP_PROP_FRAME_WIDTH, cv2.CAP_PROP_FRAME_HEIGHT):
+            return int(round(value * self.scale))
+        if prop in (cv2.CAP_PROP_FPS, cv2.CAP_PROP_FRAME_COUNT):
+            return value / self.skip
+        return value
+
+    def scale_point(self, point):
+        return tuple(int(round(v * self.scale)) for v in point)
+
+    def decode_fps(self):
+        # Source frames the decoder gets through per second of its own work
+        return self.grabbed / self.busy if self.busy else 0.0
+
+    def stats(self):
+        return {'decode_fps': round(self.decode_fps(), 1), 'decode_queue': self.frames.qsize()}
+
+    def release(self):
+        self.stop_event.set()
+        self.thread.join(timeout=1.0)
+        self.cap.release()
+
+
+class LiveReplaySource:
+    """Replays a video file like a live camera.
+
+    A background thread reads frames at the file's native FPS (wall clock
+    paced, looping at the end) into a small latest-frame buffer. When the
+    consumer falls behind, the oldest buffered frame is dropped instead of
+    making the stream lag further behind real time, which is what an RTSP
+    camera does to a slow reader.
+
+    frame_time is the perf_counter at which the frame last returned by
+    read() was "captured", so the counting stage can report frame age.
+    """
+
+    def __init__(self, path, buffer_size=1, loop=True, fps=None, window=300):
+        self.cap = cv2.VideoCapture(path)
+        self.fps = fps or self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.loop = loop
+        self.buffer = collections.deque(maxlen=max(1, buffer_size))  # (frame, captured)
+        self.ready = threading.Condition()
+        self.stop_event = threading.Event()
+        self.ended = False
+        self.produced = 0
+        self.dropped = 0  # Frames overwritten before anyone read them
+        self.frame_time = None
+        self.ages = collections.deque(maxlen=window)  # Seconds from capture to counting
+        self.thread = threading.Thread(target=self._produce, daemon=True)
+        self.thread.start()
+
+    def _produce(self):
+        interval = 1.0 / self.fps
+        next_due = time.perf_counter()
+        while not self.stop_event.is_set():
+            ret, frame = self.cap.read()
+            if not ret:
+                if self.loop and self.produced:
+                    self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    continue
+                break
+            # Hold the frame back until the camera would have delivered it
+            delay = next_due - time.perf_counter()
+            if delay > 0:
+                self.stop_event.wait(delay)
+            next_due = max(next_due + interval, time.perf_counter() - interval)
+            with self.ready:
+                if len(self.buffer) == self.buffer.maxlen:
+                    self.dropped += 1
+                self.buffer.append((frame, time.perf_counter()))
+                self.produced += 1
+                self.ready.notify()
+        with self.ready:
+            self.ended = True
+            self.ready.notify_all()
+
+    def read(self):
+        with self.ready:
+            while not self.buffer:
+                if self.ended or self.stop_event.is_set():
+                    return False, None
+                self.ready.wait(timeout=0.1)
+            frame, self.frame_time = self.buffer.popleft()
+        return True, frame
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        return self.cap.get(prop)
+
+    def observe_age(self, age):
+        self.ages.append(age)
+
+    def drop_rate(self):
+        return self.dropped / self.produced if self.produced else 0.0
+
+    def stats(self):
+        ages = list(self.ages)
+        return {'dropped': self.dropped, 'drop_rate': round(self.drop_rate(), 3),
+                'age_p50_ms': round(percentile(ages, 50) * 1000, 1),
+                'age_p95_ms': round(percentile(ages, 95) * 1000, 1)}
+
+    def release(self):
+        self.stop_event.set()
+        self.thread.join(timeout=1.0)
+        self.cap.release()
+
+
+def sample_frames(source, count):
+    # Evenly spaced frames from a video, or the first images in a directory
+    if os.path.isdir(source):
+        names = sorted(n for n in os.listdir(source) if n.lower().endswith(('.jpg', '.jpeg', '.png')))
+        return [cv2.imread(os.path.join(source, n)) for n in names[:count]]
+    cap = cv2.VideoCapture(source)
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    frames = []
+    for index in np.linspace(0, max(total - 1, 0), count).astype(int):
+        cap.set(cv2.CAP_PROP_POS_FRAMES, int(index))
+        ret, frame = cap.read()
+        if ret:
+            frames.append(frame)
+    cap.release()
+    return frames
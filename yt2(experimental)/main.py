@@ -5,6 +5,12 @@ import cvzone
 from sort import Sort
 from tracker import VehicleTracker  # Tracker class that you'll define in tracker.py
 from calibrate import get_mask, get_limits  # Mask and line calibration from calibrate.py
+import os
+import sys
+
+# Shared ROI helpers live in the repository root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from pipeline.roi import crop, mask_roi, roi_fraction
 
 # Load YOLO model
 model = YOLO("yolov8l.pt")
@@ -16,6 +22,11 @@ cap = cv2.VideoCapture("/home/adityaa/Desktop/Smart India Hackathon/video sample
 mask = get_mask("/home/adityaa/Desktop/Smart India Hackathon/yt2(experimental)/mask.png")  # Load mask from file or dynamically generate
 limits = get_limits()  # Predefined counting line (you can make this dynamic)
 
+# Detect only inside the bounding box of the mask instead of on the whole frame
+roi = mask_roi(mask)
+mask_crop = crop(mask, roi)
+print(f"ROI {roi}: {roi_fraction(roi, mask.shape):.0%} of the frame pixels")
+
 # Initialize the vehicle tracker from tracker.py
 vehicle_tracker = VehicleTracker(limits)
 
@@ -25,13 +36,17 @@ while True:
         break
     
     # Apply mask to focus on region of interest
-    imgRegion = cv2.bitwise_and(img, mask)
+    imgRegion = cv2.bitwise_and(crop(img, roi), mask_crop)
 
     # Run object detection
     results = model(imgRegion, stream=True)
     
     detections = vehicle_tracker.get_detections(results)  # Get detections from tracker
 
+    # Shift boxes from the crop back into full-frame coordinates
+    detections[:, [0, 2]] += roi[0]
+    detections[:, [1, 3]] += roi[1]
+
     # Update tracker and get counting results
     img, totalCount = vehicle_tracker.update_tracker(img, detections)
     
@@ -2,9 +2,16 @@ import cv2
 import numpy as np
 from ultralytics import YOLO
 from tracker import EuclideanDistTracker
+import os
+import sys
+
+# Shared detection post-processing lives in the repository root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from pipeline.detection import filter_result, vehicle_class_ids
 
 # Load the YOLOv8 model
 model = YOLO('yolov8x.pt')  # Use the YOLOv8x model
+vehicle_classes = vehicle_class_ids(model.names)  # Skip pedestrians and other non-vehicles
 
 # Create tracker object
 tracker = EuclideanDistTracker()  # No dist_threshold argument needed
@@ -48,14 +55,9 @@ while True:
     detections = []
 
     for result in results:
-        boxes = result.boxes.xyxy.cpu().numpy()  # Move tensor to CPU and convert to NumPy array
-        scores = result.boxes.conf.cpu().numpy()  # Move tensor to CPU and convert to NumPy array
-        for box, score in zip(boxes, scores):
-            x1, y1, x2, y2 = map(int, box)
-            w, h = x2 - x1, y2 - y1
-            # Append detection if area is significant
-            if w * h > 500:  # Adjust this threshold as needed
-                detections.append([x1, y1, w, h])
+        # Keep vehicles whose area is significant, as [x, y, w, h]
+        boxes, _ = filter_result(result, classes=vehicle_classes, min_area=500)  # Adjust this threshold as needed
+        detections.extend(boxes.tolist())
 
     # Update tracker with detections
     boxes_ids = tracker.update(detections)
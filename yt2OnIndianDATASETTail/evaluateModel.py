@@ -5,20 +5,13 @@ from ultralytics import YOLO
 
 # Load your custom model
 model_path = '/yt2OnIndianDATASET/runs/detect/train7/weights/best.pt'
-model = YOLO(model_path)
 
 # Path to your test images and ground truth labels
 test_images_path = '/yt2OnIndianDATASET/dataset/test/images'
 ground_truth_path = '/yt2OnIndianDATASET/dataset/test/labels'
 
-# Initialize counters for evaluation
-total_objects = 0
-true_positives = 0
-false_positives = 0
-false_negatives = 0
-
-def read_ground_truth(image_name):
-    label_file = os.path.join(ground_truth_path, image_name.replace('.jpg', '.txt').replace('.png', '.txt'))
+def read_ground_truth(image_name, labels_path=ground_truth_path):
+    label_file = os.path.join(labels_path, image_name.replace('.jpg', '.txt').replace('.png', '.txt'))
     if not os.path.exists(label_file):
         return []
     with open(label_file, 'r') as f:
@@ -38,44 +31,59 @@ def calculate_iou(boxA, boxB):
     iou = interArea / float(boxAArea + boxBArea - interArea)
     return iou
 
-# Iterate over all test images
-for image_name in os.listdir(test_images_path):
-    if image_name.endswith('.jpg') or image_name.endswith('.png'):
-        # Load image
-        image_path = os.path.join(test_images_path, image_name)
-        image = cv2.imread(image_path)
-
-        # Perform inference
-        results = model(image)
-
-        # Extract detections
-        detections = results[0].boxes.xyxy.cpu().numpy()
-        scores = results[0].boxes.conf.cpu().numpy()
-
-        # Read ground truth
-        ground_truth_objects = read_ground_truth(image_name)
-        total_objects += len(ground_truth_objects)
-
-        matched_gt = set()
-        for det in detections:
-            det_box = list(map(int, det))
-            matched = False
-            for idx, gt in enumerate(ground_truth_objects):
-                gt_box = [int(gt[1] * image.shape[1]), int(gt[2] * image.shape[0]),
-                          int(gt[3] * image.shape[1]), int(gt[4] * image.shape[0])]
-                if calculate_iou(det_box, gt_box) > 0.5:
-                    matched_gt.add(idx)
-                    true_positives += 1
-                    matched = True
-                    break
-            if not matched:
-                false_positives += 1
-
-        false_negatives += len(ground_truth_objects) - len(matched_gt)
-
-# Calculate accuracy
-precision = true_positives / (true_positives + false_positives) if (true_positives + false_positives) > 0 else 0
-recall = true_positives / (true_positives + false_negatives) if (true_positives + false_negatives) > 0 else 0
-print(f"Precision: {precision:.2f}")
-print(f"Recall: {recall:.2f}")
-print(f"F1 Score: {2 * (precision * recall) / (precision + recall) if (precision + recall) > 0 else 0:.2f}")
+def ground_truth_box(gt, image):
+    # YOLO labels are: class, x centre, y centre, width, height (normalised)
+    _, cx, cy, w, h = gt[:5]
+    height, width = image.shape[:2]
+    return [int((cx - w / 2) * width), int((cy - h / 2) * height),
+            int((cx + w / 2) * width), int((cy + h / 2) * height)]
+
+def evaluate(predict, images_path=test_images_path, labels_path=ground_truth_path, iou_threshold=0.5):
+    """Score a detector on the test set.
+
+    predict(image) returns the detected boxes as an (N, 4) xyxy array. Returns
+    (precision, recall, f1).
+    """
+    true_positives = 0
+    false_positives = 0
+    false_negatives = 0
+
+    # Iterate over all test images
+    for image_name in os.listdir(images_path):
+        if image_name.endswith('.jpg') or image_name.endswith('.png'):
+            # Load image
+            image = cv2.imread(os.path.join(images_path, image_name))
+
+            # Perform inference
+            detections = predict(image)
+
+            # Read ground truth
+            ground_truth_objects = read_ground_truth(image_name, labels_path)
+
+            matched_gt = set()
+            for det in detections:
+                det_box = list(map(int, det))
+                matched = False
+                for idx, gt in enumerate(ground_truth_objects):
+                    if calculate_iou(det_box, ground_truth_box(gt, image)) > iou_threshold:
+                        matched_gt.add(idx)
+                        true_positives += 1
+                        matched = True
+                        break
+                if not matched:
+                    false_positives += 1
+
+            false_negatives += len(ground_truth_objects) - len(matched_gt)
+
+    # Calculate accuracy
+    precision = true_positives / (true_positives + false_positives) if (true_positives + false_positives) > 0 else 0
+    recall = true_positives / (true_positives + false_negatives) if (true_positives + false_negatives) > 0 else 0
+    f1 = 2 * (precision * recall) / (precision + recall) if (precision + recall) > 0 else 0
+    return precision, recall, f1
+
+if __name__ == "__main__":
+    model = YOLO(model_path)
+    precision, recall, f1 = evaluate(lambda image: model(image)[0].boxes.xyxy.cpu().numpy())
+    print(f"Precision: {precision:.2f}")
+    print(f"Recall: {recall:.2f}")
+    print(f"F1 Score: {f1:.2f}")
@@ -7,6 +7,12 @@ from torchvision.ops import nms
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_agg import FigureCanvasAgg as FigureCanvas
 import time
+import os
+import sys
+
+# Shared detection post-processing lives in the repository root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from pipeline.detection import filter_result, vehicle_class_ids
 
 # Check CUDA availability
 device = 'cuda' if torch.cuda.is_available() else 'cpu'
@@ -19,6 +25,10 @@ custom_model = YOLO('/home/adityaa/Desktop/Smart India Hackathon/yt2OnIndianDATA
 pretrained_model.model.to(device)
 custom_model.model.to(device)
 
+# Vehicle class IDs differ between the COCO and the Indian roads model
+pretrained_classes = vehicle_class_ids(pretrained_model.names)
+custom_classes = vehicle_class_ids(custom_model.names)
+
 # Create tracker object
 tracker = EuclideanDistTracker()
 
@@ -63,41 +73,26 @@ while True:
     if not ret:
         break
 
-    detections = []
-
-    # Pre-trained model detection
-    pretrained_results = pretrained_model(frame)
-    for result in pretrained_results:
-        boxes = result.boxes.xyxy.cpu().numpy()
-        scores = result.boxes.conf.cpu().numpy()
-        for box, score in zip(boxes, scores):
-            if score > 0.3:  # Confidence threshold
-                x1, y1, x2, y2 = map(int, box)
-                w, h = x2 - x1, y2 - y1
-                detections.append([x1, y1, w, h, score])
-
-    # Custom model detection
-    custom_results = custom_model(frame)
-    for result in custom_results:
-        boxes = result.boxes.xyxy.cpu().numpy()
-        scores = result.boxes.conf.cpu().numpy()
-        for box, score in zip(boxes, scores):
-            if score > 0.3:  # Confidence threshold
-                x1, y1, x2, y2 = map(int, box)
-                w, h = x2 - x1, y2 - y1
-                detections.append([x1, y1, w, h, score])
-
-    # Apply NMS to reduce overlapping boxes
-    if detections:
-        boxes = np.array([det[:4] for det in detections])
-        scores = np.array([det[4] for det in detections])
-        boxes = torch.tensor(boxes, dtype=torch.float32)
-        scores = torch.tensor(scores, dtype=torch.float32)
-        keep = nms(boxes, scores, iou_threshold=0.4)  # Adjust IoU threshold as needed
-        detections = [list(boxes[i].numpy()) + [scores[i].item()] for i in keep]
+    all_boxes, all_scores = [], []
+
+    # Pre-trained and custom model detection
+    for model, classes in ((pretrained_model, pretrained_classes), (custom_model, custom_classes)):
+        for result in model(frame):
+            boxes, scores = filter_result(result, classes=classes, min_conf=0.3, min_area=0)  # Confidence threshold
+            all_boxes.append(boxes)
+            all_scores.append(scores)
+
+    boxes = np.concatenate(all_boxes)
+    scores = np.concatenate(all_scores)
+
+    # Apply NMS to reduce overlapping boxes (nms expects x1, y1, x2, y2)
+    if len(boxes):
+        corners = np.concatenate([boxes[:, :2], boxes[:, :2] + boxes[:, 2:]], axis=1)
+        keep = nms(torch.from_numpy(corners.astype(np.float32)), torch.from_numpy(scores), iou_threshold=0.4)  # Adjust IoU threshold as needed
+        boxes = boxes[keep.numpy()]
 
     # Update tracker with detections
-    boxes_ids = tracker.update([det[:4] for det in detections])  # Pass only x, y, w, h
+    boxes_ids = tracker.update(boxes.tolist())  # Pass only x, y, w, h
 
     # Draw the results and detect line crossings
     for box_id in boxes_ids: